@@ -0,0 +1,409 @@
+import importlib.util
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from typing import Any
+
+import numpy as np
+
+from datacache import DATA_DIR, MISSING, load_csv
+from datamodel import Observation, Order, SortedOrderDepth, Symbol, Trade, TradingState
+from observations import SOUTH_HALF_SPREAD, ObservationColumns, load_columns
+
+POSITION_LIMITS = {'AMETHYSTS' : 20, 'STARFRUIT' : 20, 'ORCHIDS' : 100}
+SUBMISSION = "SUBMISSION"
+
+
+def prices_path(round_num: int, day: int, data_dir: str = DATA_DIR) -> str:
+    return os.path.join(data_dir, f"round-{round_num}-island-data-bottle", f"prices_round_{round_num}_day_{day}.csv")
+
+
+def trades_path(round_num: int, day: int, data_dir: str = DATA_DIR) -> str:
+    return os.path.join(data_dir, f"round-{round_num}-island-data-bottle", f"trades_round_{round_num}_day_{day}_nn.csv")
+
+
+class DayData:
+    """Parsed order books and market trades of one day, keyed by timestamp.
+
+    books[timestamp][product] is a (buy_orders, sell_orders) pair of price -> volume dicts
+    in the exchange's sign convention (sell volumes negative), each side sorted best level first.
+    observations[i] builds the Observation of timestamps[i] on demand.
+    """
+
+    def __init__(self, round_num: int, day: int, timestamps: list[int], products: list[Symbol],
+                 books: dict[int, dict[Symbol, tuple[dict[int, int], dict[int, int]]]],
+                 mid_prices: dict[int, dict[Symbol, float]],
+                 trades: dict[int, list[Trade]], observations: ObservationColumns | None = None) -> None:
+        self.round_num = round_num
+        self.day = day
+        self.timestamps = timestamps
+        self.products = products
+        self.books = books
+        self.mid_prices = mid_prices
+        self.trades = trades
+        self.observations = observations if observations is not None else ObservationColumns(np.asarray(timestamps))
+
+
+def load_prices(path: str) -> tuple[list[int], list[Symbol], dict, dict]:
+    table = load_csv(path)
+    products = table.categories["product"]
+    books: dict[int, dict[Symbol, tuple[dict[int, int], dict[int, int]]]] = {}
+    mid_prices: dict[int, dict[Symbol, float]] = {}
+
+    levels = range(1, 4)
+    bid_prices = [table[f"bid_price_{i}"].tolist() for i in levels]
+    bid_volumes = [table[f"bid_volume_{i}"].tolist() for i in levels]
+    ask_prices = [table[f"ask_price_{i}"].tolist() for i in levels]
+    ask_volumes = [table[f"ask_volume_{i}"].tolist() for i in levels]
+
+    for row, (timestamp, code, mid_price) in enumerate(zip(table["timestamp"].tolist(), table["product"].tolist(),
+                                                          table["mid_price"].tolist())):
+        buy_orders = {}
+        for prices, volumes in zip(bid_prices, bid_volumes):
+            if prices[row] != MISSING:
+                buy_orders[prices[row]] = volumes[row]
+
+        sell_orders = {}
+        for prices, volumes in zip(ask_prices, ask_volumes):
+            if prices[row] != MISSING:
+                sell_orders[prices[row]] = -volumes[row]
+
+        if timestamp not in books:
+            books[timestamp] = {}
+            mid_prices[timestamp] = {}
+        books[timestamp][products[code]] = (buy_orders, sell_orders)
+        mid_prices[timestamp][products[code]] = mid_price
+
+    return sorted(books), list(products), books, mid_prices
+
+
+def load_trades(path: str) -> dict[int, list[Trade]]:
+    trades: dict[int, list[Trade]] = {}
+    if not os.path.exists(path):
+        return trades
+
+    table = load_csv(path)
+    if len(table) == 0:
+        return trades
+
+    timestamps = table["timestamp"].tolist()
+    batch = Trade.batch(table.decode("symbol"), table["price"].tolist(), table["quantity"].tolist(),
+                        table.decode("buyer"), table.decode("seller"), timestamps)
+    for timestamp, trade in zip(timestamps, batch):
+        trades.setdefault(timestamp, []).append(trade)
+
+    return trades
+
+
+def load_day(round_num: int, day: int, data_dir: str = DATA_DIR, south_half_spread: float = SOUTH_HALF_SPREAD) -> DayData:
+    path = prices_path(round_num, day, data_dir)
+    trades = load_trades(trades_path(round_num, day, data_dir))
+    if "product" in load_csv(path).categories:
+        timestamps, products, books, mid_prices = load_prices(path)
+        return DayData(round_num, day, timestamps, products, books, mid_prices, trades)
+
+    # Wide files have observations and one price per product but no books, so their states carry
+    # empty order depths and positions (from conversions alone) are marked at that price
+    columns = load_columns(path, south_half_spread)
+    timestamps = columns.timestamps.tolist()
+    books = {timestamp: {} for timestamp in timestamps}
+    prices = {product: values.tolist() for product, values in columns.prices.items()}
+    mid_prices = {timestamp: {product: values[i] for product, values in prices.items()}
+                  for i, timestamp in enumerate(timestamps)}
+    return DayData(round_num, day, timestamps, columns.products, books, mid_prices, trades, columns.observations)
+
+
+def load_trader(path: str) -> type:
+    """Import a trader file under a unique module name and return its Trader class."""
+    name = "_trader_" + os.path.splitext(os.path.basename(path))[0].replace("-", "_")
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module.Trader
+
+
+def process_pool(workers: int, initializer: Any = None, initargs: tuple = ()) -> ProcessPoolExecutor:
+    """A process pool that forks where the platform allows, so workers inherit the parent's loaded data."""
+    method = "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method),
+                               initializer=initializer, initargs=initargs)
+
+
+def day_states(data: DayData, positions: list[dict[Symbol, int]] | None = None) -> list[TradingState]:
+    """The states run_backtest sends for a day, independent of any trader's orders.
+
+    positions[i] is the position held after tick i (e.g. BacktestResult.positions of a reference
+    run); without it every state is flat. Own trades are always empty.
+    """
+    listings = {product: {"symbol": product, "product": product, "denomination": "SEASHELLS"}
+                for product in data.products}
+    states = []
+    market_trades: dict[Symbol, list[Trade]] = {}
+    position: dict[Symbol, int] = {}
+    for i, timestamp in enumerate(data.timestamps):
+        order_depths = {product: SortedOrderDepth(*book) for product, book in data.books[timestamp].items()}
+        states.append(TradingState("", timestamp, listings, order_depths, {}, market_trades, position,
+                                   data.observations[i]))
+        market_trades = {}
+        for trade in data.trades.get(timestamp, []):
+            market_trades.setdefault(trade.symbol, []).append(trade)
+        if positions is not None:
+            position = positions[i]
+    return states
+
+
+def copy_state(state: TradingState, trader_data: str) -> TradingState:
+    """A state with the given traderData and its own copy of the books, for replaying one state to several traders."""
+    order_depths = {symbol: SortedOrderDepth(dict(depth.buy_orders), dict(depth.sell_orders))
+                    for symbol, depth in state.order_depths.items()}
+    return TradingState(trader_data, state.timestamp, state.listings, order_depths, state.own_trades,
+                        state.market_trades, state.position, state.observations)
+
+
+class BacktestResult:
+
+    def __init__(self, day: int, products: list[Symbol]) -> None:
+        self.day = day
+        self.products = products
+        self.timestamps: list[int] = []
+        self.pnl_path: list[float] = []
+        self.positions: list[dict[Symbol, int]] = []
+        self.fills: list[Trade] = []
+        self.pnl: dict[Symbol, float] = {product: 0.0 for product in products}
+
+    @property
+    def total_pnl(self) -> float:
+        return sum(self.pnl.values())
+
+    @property
+    def max_drawdown(self) -> float:
+        peak = 0.0
+        drawdown = 0.0
+        for value in self.pnl_path:
+            peak = max(peak, value)
+            drawdown = max(drawdown, peak - value)
+        return drawdown
+
+
+def match_orders(symbol: Symbol, orders: list[Order], buy_orders: dict[int, int], sell_orders: dict[int, int],
+                 market_trades: list[Trade], timestamp: int, queue: bool = False) -> list[Trade]:
+    """Fill orders against the book first, then against the market trades of the same tick.
+
+    Book fills happen at the resting level's price, trade fills at our order's price.
+    The book sides must iterate best level first (as BookSide does) and are consumed in place.
+
+    With queue, an order joining a price level the book already shows waits behind that level's
+    volume: market trades at exactly its price go to the queue ahead first, trades through its
+    price fill it directly. Orders only live for one tick, so the queue never carries over.
+    """
+    fills = []
+    remaining_trades = [trade.quantity for trade in market_trades]
+    # Volume ahead of each order, taken from the book before any of our orders trade
+    if queue:
+        queues = [buy_orders.get(order.price, 0) if order.quantity > 0 else -sell_orders.get(order.price, 0)
+                  for order in orders]
+
+    for n, order in enumerate(orders):
+        quantity = int(order.quantity)
+        ahead = queues[n] if queue else 0
+        if quantity > 0:
+            for price in list(sell_orders):
+                if price > order.price or quantity == 0:
+                    break
+                volume = min(quantity, -sell_orders[price])
+                fills.append(Trade(symbol, price, volume, SUBMISSION, "", timestamp))
+                quantity -= volume
+                sell_orders[price] += volume
+                if sell_orders[price] == 0:
+                    del sell_orders[price]
+
+            for i, trade in enumerate(market_trades):
+                if quantity == 0:
+                    break
+                if ahead and trade.price == order.price and remaining_trades[i] > 0:
+                    used = min(ahead, remaining_trades[i])
+                    ahead -= used
+                    remaining_trades[i] -= used
+                if trade.price <= order.price and remaining_trades[i] > 0:
+                    volume = min(quantity, remaining_trades[i])
+                    fills.append(Trade(symbol, order.price, volume, SUBMISSION, trade.seller, timestamp))
+                    quantity -= volume
+                    remaining_trades[i] -= volume
+
+        elif quantity < 0:
+            quantity = -quantity
+            for price in list(buy_orders):
+                if price < order.price or quantity == 0:
+                    break
+                volume = min(quantity, buy_orders[price])
+                fills.append(Trade(symbol, price, volume, "", SUBMISSION, timestamp))
+                quantity -= volume
+                buy_orders[price] -= volume
+                if buy_orders[price] == 0:
+                    del buy_orders[price]
+
+            for i, trade in enumerate(market_trades):
+                if quantity == 0:
+                    break
+                if ahead and trade.price == order.price and remaining_trades[i] > 0:
+                    used = min(ahead, remaining_trades[i])
+                    ahead -= used
+                    remaining_trades[i] -= used
+                if trade.price >= order.price and remaining_trades[i] > 0:
+                    volume = min(quantity, remaining_trades[i])
+                    fills.append(Trade(symbol, order.price, volume, trade.buyer, SUBMISSION, timestamp))
+                    quantity -= volume
+                    remaining_trades[i] -= volume
+
+    return fills
+
+
+def within_limits(orders: list[Order], position: int, limit: int) -> bool:
+    # The exchange cancels every order for a product if all its buys or all its sells
+    # filling would take the position past the limit
+    total_buy = sum(order.quantity for order in orders if order.quantity > 0)
+    total_sell = sum(-order.quantity for order in orders if order.quantity < 0)
+    return position + total_buy <= limit and position - total_sell >= -limit
+
+
+def apply_conversions(conversions: int, observations: Observation, position: dict[Symbol, int],
+                      cash: dict[Symbol, float]) -> None:
+    """Convert against the South before the tick's orders match, as the exchange does.
+
+    Imports (conversions > 0) cover a short at askPrice + transportFees + importTariff and exports
+    sell a long at bidPrice - transportFees - exportTariff. Like the exchange, a request that
+    would do more than flatten the position is ignored. Storage costs are not charged.
+    """
+    if not conversions:
+        return
+    if len(observations.conversionObservations) != 1:
+        raise ValueError(f"conversions requested on a tick with {len(observations.conversionObservations)} "
+                         f"conversion observations instead of one")
+    (product, observation), = observations.conversionObservations.items()
+    if product not in cash:
+        raise ValueError(f"conversions requested for {product}, which is not traded on this day")
+
+    held = position.get(product, 0)
+    if held == 0 or abs(conversions) > abs(held) or (conversions > 0) == (held > 0):
+        return
+    if conversions > 0:
+        price = observation.askPrice + observation.transportFees + observation.importTariff
+    else:
+        price = observation.bidPrice - observation.transportFees - observation.exportTariff
+    position[product] = held + conversions
+    cash[product] -= conversions * price
+
+
+def book_fills(symbol: Symbol, fills: list[Trade], position: dict[Symbol, int], cash: dict[Symbol, float]) -> None:
+    for fill in fills:
+        if fill.buyer == SUBMISSION:
+            position[symbol] = position.get(symbol, 0) + fill.quantity
+            cash[symbol] -= fill.price * fill.quantity
+        else:
+            position[symbol] = position.get(symbol, 0) - fill.quantity
+            cash[symbol] += fill.price * fill.quantity
+
+
+def run_backtest(trader: Any, data: DayData, position_limits: dict[Symbol, int] = POSITION_LIMITS,
+                 match_trades: bool = True, print_output: bool = False, queue: bool = False) -> BacktestResult:
+    """Replay one day through trader.run and track fills, positions and mark-to-mid PnL.
+
+    The conversions trader.run returns are applied before its orders match (see apply_conversions).
+    Orders for a product without a position limit raise ValueError rather than being cancelled.
+    queue makes passive fills against market trades wait behind the book's volume at their price (see match_orders).
+    """
+    result = BacktestResult(data.day, data.products)
+    listings = {product: {"symbol": product, "product": product, "denomination": "SEASHELLS"}
+                for product in data.products}
+    position = {}
+    cash = {product: 0.0 for product in data.products}
+    own_trades: dict[Symbol, list[Trade]] = {}
+    market_trades: dict[Symbol, list[Trade]] = {}
+    trader_data = ""
+
+    sink = None if print_output else open(os.devnull, "w")
+    try:
+        for i, timestamp in enumerate(data.timestamps):
+            order_depths = {}
+            for product, (buy_orders, sell_orders) in data.books[timestamp].items():
+                order_depths[product] = SortedOrderDepth(buy_orders, sell_orders)
+
+            # Listings are plain dicts on the exchange, which Logger.compress_listings relies on
+            state = TradingState(trader_data, timestamp, listings, order_depths, own_trades, market_trades,
+                                 dict(position), data.observations[i])
+
+            if sink is None:
+                orders, conversions, trader_data = trader.run(state)
+            else:
+                with redirect_stdout(sink):
+                    orders, conversions, trader_data = trader.run(state)
+
+            tick_trades: dict[Symbol, list[Trade]] = {}
+            for trade in data.trades.get(timestamp, []):
+                tick_trades.setdefault(trade.symbol, []).append(trade)
+
+            apply_conversions(conversions, state.observations, position, cash)
+
+            own_trades = {}
+            for symbol, symbol_orders in orders.items():
+                if not symbol_orders:
+                    continue
+                if symbol not in position_limits:
+                    raise ValueError(f"orders for {symbol}, which has no position limit")
+                if symbol not in order_depths:
+                    continue
+                if not within_limits(symbol_orders, position.get(symbol, 0), position_limits[symbol]):
+                    continue
+
+                fills = match_orders(symbol, symbol_orders, order_depths[symbol].buy_orders,
+                                     order_depths[symbol].sell_orders,
+                                     tick_trades.get(symbol, []) if match_trades else [], timestamp, queue)
+                book_fills(symbol, fills, position, cash)
+                if fills:
+                    own_trades[symbol] = fills
+                    result.fills.extend(fills)
+
+            market_trades = tick_trades
+            mid_prices = data.mid_prices[timestamp]
+            for product in data.products:
+                result.pnl[product] = cash[product] + position.get(product, 0) * mid_prices[product]
+
+            result.timestamps.append(timestamp)
+            result.pnl_path.append(sum(result.pnl.values()))
+            result.positions.append(dict(position))
+    finally:
+        if sink is not None:
+            sink.close()
+
+    return result
+
+
+def print_summary(result: BacktestResult) -> None:
+    print(f"Day {result.day}")
+    for product, pnl in result.pnl.items():
+        print(f"  {product}: {pnl:,.1f}")
+    print(f"  Total: {result.total_pnl:,.1f}, max drawdown {result.max_drawdown:,.1f}, fills {len(result.fills)}")
+
+
+if __name__ == "__main__":
+    # python backtester.py [trader.py] [round] [days...] [--queue]
+    args = [arg for arg in sys.argv[1:] if arg != "--queue"]
+    queue = len(args) < len(sys.argv) - 1
+    trader_file = args[0] if len(args) > 0 else os.path.join(DATA_DIR, "trader.py")
+    round_num = int(args[1]) if len(args) > 1 else 1
+    days = [int(day) for day in args[2:]] or [-2, -1, 0]
+
+    trader_cls = load_trader(trader_file)
+    total = 0.0
+    for day in days:
+        start = time.perf_counter()
+        data = load_day(round_num, day)
+        result = run_backtest(trader_cls(), data, queue=queue)
+        print_summary(result)
+        print(f"  ({time.perf_counter() - start:.2f}s)")
+        total += result.total_pnl
+    print(f"Total PnL: {total:,.1f}")
@@ -0,0 +1,223 @@
+"""Whole-column NumPy versions of the features in features.py, for research over full days.
+
+Takes the same feature specs as FeatureEngine (names or (name, params) pairs) and returns one
+array per feature over a product's rows of a prices file, sorted by timestamp. Row i holds the
+value FeatureEngine produces on tick i when replayed through the backtester, where market
+trades arrive one tick after they print. check_parity() verifies this against the online code.
+
+    python batchfeatures.py [round] [days...]
+"""
+import sys
+import time
+from typing import Any, Callable
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from datacache import MISSING, Table, load_csv
+from features import FEATURES
+
+BATCH_FEATURES: dict[str, Callable[..., np.ndarray]] = {}
+
+
+def batch_feature(name: str):
+    def register(func: Callable[..., np.ndarray]) -> Callable[..., np.ndarray]:
+        BATCH_FEATURES[name] = func
+        return func
+    return register
+
+
+class Columns:
+    """One product's book columns from a prices table, as float arrays with NaN for empty levels."""
+
+    def __init__(self, prices: Table, product: str, trades: Table | None = None) -> None:
+        rows = np.flatnonzero(prices.mask("product", product))
+        rows = rows[np.argsort(prices["timestamp"][rows], kind="stable")]
+        self.timestamps = np.asarray(prices["timestamp"][rows])
+
+        def column(name: str) -> np.ndarray:
+            values = np.asarray(prices[name][rows])
+            return np.where(values == MISSING, np.nan, values).astype(np.float64)
+
+        self.bid_price = column("bid_price_1")
+        self.ask_price = column("ask_price_1")
+        self.bid_volume = np.nan_to_num(column("bid_volume_1"))
+        self.ask_volume = np.nan_to_num(column("ask_volume_1"))
+        self.bid_levels = sum((np.asarray(prices[f"bid_price_{i}"][rows]) != MISSING).astype(np.int64) for i in range(1, 4))
+        self.ask_levels = sum((np.asarray(prices[f"ask_price_{i}"][rows]) != MISSING).astype(np.int64) for i in range(1, 4))
+        self.mid_price = (self.bid_price + self.ask_price) / 2
+        self.trade_price = self.last_trade_prices(trades, product) if trades is not None else np.full(len(rows), np.nan)
+
+    def last_trade_prices(self, trades: Table, product: str) -> np.ndarray:
+        # Price of the latest trade printed before each tick, i.e. at or before the previous timestamp
+        mask = trades.mask("symbol", product)
+        trade_times = np.asarray(trades["timestamp"][mask])
+        trade_prices = np.asarray(trades["price"][mask]).astype(np.float64)
+        order = np.argsort(trade_times, kind="stable")
+        trade_times, trade_prices = trade_times[order], trade_prices[order]
+
+        previous = np.concatenate(([np.iinfo(np.int64).min], self.timestamps[:-1]))
+        index = np.searchsorted(trade_times, previous, side="right") - 1
+        result = np.where(index >= 0, trade_prices[np.maximum(index, 0)], np.nan)
+        result[0] = np.nan
+        return result
+
+    def price(self, source: str) -> np.ndarray:
+        return self.mid_price if source == "mid" else self.trade_price
+
+
+def diff_with_nan(values: np.ndarray) -> np.ndarray:
+    result = np.empty(len(values))
+    result[:1] = np.nan
+    result[1:] = values[1:] - values[:-1]
+    return result
+
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    # Sample std over the trailing window; NaN until the window is full. A leading NaN block
+    # (no price yet) is skipped, as the online feature does.
+    result = np.full(len(values), np.nan)
+    start = int(np.argmax(~np.isnan(values))) if (~np.isnan(values)).any() else len(values)
+    if len(values) - start >= window:
+        result[start + window - 1:] = sliding_window_view(values[start:], window).std(axis=1, ddof=1)
+    return result
+
+
+@batch_feature("mid_price")
+def mid_price(columns: Columns) -> np.ndarray:
+    return columns.mid_price
+
+
+@batch_feature("spread")
+def spread(columns: Columns) -> np.ndarray:
+    return (columns.ask_price - columns.bid_price) / columns.mid_price
+
+
+@batch_feature("orderbook_imbalance")
+def orderbook_imbalance(columns: Columns) -> np.ndarray:
+    total = columns.ask_levels + columns.bid_levels
+    return np.divide(columns.ask_levels - columns.bid_levels, total, out=np.zeros(len(total)), where=total != 0)
+
+
+@batch_feature("orderbook_imbalance_ratio")
+def orderbook_imbalance_ratio(columns: Columns) -> np.ndarray:
+    return np.divide(columns.ask_levels, columns.bid_levels, out=np.full(len(columns.bid_levels), np.inf),
+                     where=columns.bid_levels != 0)
+
+
+@batch_feature("bid_flow")
+def bid_flow(columns: Columns) -> np.ndarray:
+    return diff_with_nan(columns.bid_volume)
+
+
+@batch_feature("ask_flow")
+def ask_flow(columns: Columns) -> np.ndarray:
+    return diff_with_nan(columns.ask_volume)
+
+
+@batch_feature("order_flow_imbalance")
+def order_flow_imbalance(columns: Columns) -> np.ndarray:
+    return bid_flow(columns) - ask_flow(columns)
+
+
+@batch_feature("rip_indicator")
+def rip_indicator(columns: Columns, periods: int = 5, threshold: float = 0.05, source: str = "mid") -> np.ndarray:
+    prices = columns.price(source)
+    result = np.zeros(len(prices))
+    with np.errstate(invalid="ignore"):
+        result[periods:] = (prices[periods:] / prices[:-periods] - 1 >= threshold).astype(np.float64)
+    return result
+
+
+@batch_feature("x_vol")
+def x_vol(columns: Columns, window: int = 10, source: str = "mid") -> np.ndarray:
+    return rolling_std(columns.price(source), window)
+
+
+@batch_feature("vol_ratio")
+def vol_ratio(columns: Columns, window: int = 10, vol_window: int = 10, source: str = "mid") -> np.ndarray:
+    vols = x_vol(columns, vol_window, source)
+    result = np.full(len(vols), np.nan)
+    start = int(np.argmax(~np.isnan(vols))) if (~np.isnan(vols)).any() else len(vols)
+    if len(vols) - start >= window:
+        windows = sliding_window_view(vols[start:], window)
+        mean = windows.mean(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ratio = (windows.max(axis=1) - windows.min(axis=1)) / mean
+        result[start + window - 1:] = np.where(mean != 0, ratio, np.nan)
+    return result
+
+
+def compute_features(prices: Table, product: str, features: list[str | tuple[str, dict[str, Any]]],
+                     trades: Table | None = None) -> dict[str, np.ndarray]:
+    columns = Columns(prices, product, trades)
+    result = {"timestamp": columns.timestamps}
+    for spec in features:
+        name, params = (spec, {}) if isinstance(spec, str) else spec
+        result[name] = BATCH_FEATURES[name](columns, **params)
+    return result
+
+
+def load_features(round_num: int, day: int, product: str, features: list[str | tuple[str, dict[str, Any]]]) -> dict[str, np.ndarray]:
+    from backtester import prices_path, trades_path
+    return compute_features(load_csv(prices_path(round_num, day)), product, features, load_csv(trades_path(round_num, day)))
+
+
+# Every registered feature plus the variants with non-default params
+PARITY_FEATURES = list(FEATURES) + [("x_vol", {"source": "trade"}), ("vol_ratio", {"source": "trade"}),
+                                    ("rip_indicator", {"periods": 3, "threshold": 0.0005})]
+
+
+def parity_mismatches(data: Any, prices: Table, trades: Table, features: list = None) -> list[str]:
+    """Replay data's states through FeatureEngine and compare them with the batch columns of its files.
+
+    data is a backtester.DayData, possibly cut to its first ticks; prices and trades are the
+    day's full tables, which give the same leading rows since every feature is causal.
+    """
+    from backtester import day_states
+    from features import FeatureEngine
+
+    engine = FeatureEngine(features or PARITY_FEATURES, data.products)
+    online = {product: [] for product in data.products}
+    for state in day_states(data):
+        for product, values in engine.update(state).items():
+            online[product].append(values)
+
+    mismatches = []
+    for product in data.products:
+        columns = Columns(prices, product, trades)
+        expected = np.array(online[product])
+        # Specs are checked one at a time, as the same feature may appear with different params
+        for i, (name, params) in enumerate(engine.specs):
+            batch = BATCH_FEATURES[name](columns, **params)[:len(expected)]
+            close = np.isclose(batch, expected[:, i], rtol=1e-9, atol=1e-9, equal_nan=True)
+            if not close.all():
+                bad = np.flatnonzero(~close)
+                mismatches.append(f"day {data.day} {product} {name} {params}: {len(bad)} rows differ, first at row "
+                                  f"{bad[0]} (batch {batch[bad[0]]}, online {expected[bad[0], i]})")
+    return mismatches
+
+
+def check_parity(round_num: int = 1, days: list[int] = (-2, -1, 0), features: list = None) -> None:
+    """Replay each full day through FeatureEngine and assert it matches the batch columns."""
+    from backtester import load_day, prices_path, trades_path
+
+    for day in days:
+        data = load_day(round_num, day)
+        mismatches = parity_mismatches(data, load_csv(prices_path(round_num, day)), load_csv(trades_path(round_num, day)),
+                                       features)
+        if mismatches:
+            raise AssertionError("\n".join(mismatches))
+        print(f"Day {day}: {len(features or PARITY_FEATURES)} features match for {', '.join(data.products)}")
+
+
+if __name__ == "__main__":
+    round_num = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    days = [int(day) for day in sys.argv[2:]] or [-2, -1, 0]
+    check_parity(round_num, days)
+
+    start = time.perf_counter()
+    for day in days:
+        for product in ("AMETHYSTS", "STARFRUIT"):
+            load_features(round_num, day, product, list(BATCH_FEATURES))
+    print(f"All features for {len(days)} days x 2 products in {(time.perf_counter() - start) * 1000:.1f}ms")
@@ -0,0 +1,87 @@
+"""Memory and allocation cost of the Order/Trade objects one 10,000-tick day creates.
+
+Compares the slotted datamodel classes with equivalent __dict__-based classes (their previous layout).
+Run from the repo root: python -m benchmarks.datamodel_memory [trader.py] [day]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+from backtester import DATA_DIR, load_day, load_trader, run_backtest
+from datamodel import Order, Trade
+
+
+class DictOrder:
+
+    def __init__(self, symbol, price, quantity) -> None:
+        self.symbol = symbol
+        self.price = price
+        self.quantity = quantity
+
+
+class DictTrade:
+
+    def __init__(self, symbol, price, quantity, buyer=None, seller=None, timestamp=0) -> None:
+        self.symbol = symbol
+        self.price = price
+        self.quantity = quantity
+        self.buyer = buyer
+        self.seller = seller
+        self.timestamp = timestamp
+
+
+def count_day(trader_file: str, day: int) -> tuple[int, int, list]:
+    """Orders the trader sends and Trades the replay creates over one day."""
+    data = load_day(1, day)
+    trader = load_trader(trader_file)()
+    sent = []
+    run = trader.run
+
+    def counting_run(state):
+        orders, conversions, trader_data = run(state)
+        sent.extend(order for symbol_orders in orders.values() for order in symbol_orders)
+        return orders, conversions, trader_data
+
+    trader.run = counting_run
+    result = run_backtest(trader, data)
+    market_trades = [trade for trades in data.trades.values() for trade in trades]
+    return len(sent), len(result.fills) + len(market_trades), market_trades
+
+
+def measure(build) -> tuple[int, int, float]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    objects = build()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    allocations = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    tracemalloc.stop()
+    del objects
+    return size, allocations, elapsed
+
+
+if __name__ == "__main__":
+    trader_file = sys.argv[1] if len(sys.argv) > 1 else os.path.join(DATA_DIR, "trader.py")
+    day = int(sys.argv[2]) if len(sys.argv) > 2 else -2
+    n_orders, n_trades, market_trades = count_day(trader_file, day)
+    columns = ([t.symbol for t in market_trades], [t.price for t in market_trades], [t.quantity for t in market_trades],
+               [t.buyer for t in market_trades], [t.seller for t in market_trades], [t.timestamp for t in market_trades])
+    repeat = -(-n_trades // max(len(market_trades), 1))
+
+    cases = [
+        ("Order", n_orders,
+         lambda: [Order("STARFRUIT", 5000 + i % 7, i % 20) for i in range(n_orders)],
+         lambda: [DictOrder("STARFRUIT", 5000 + i % 7, i % 20) for i in range(n_orders)]),
+        ("Trade", repeat * len(market_trades),
+         lambda: [trade for _ in range(repeat) for trade in Trade.batch(*columns)],
+         lambda: [trade for _ in range(repeat) for trade in map(DictTrade, *columns)]),
+    ]
+
+    print(f"Day {day}: {n_orders} orders sent, {n_trades} trades created")
+    for name, count, slotted, plain in cases:
+        slotted_size, slotted_allocs, slotted_time = measure(slotted)
+        plain_size, plain_allocs, plain_time = measure(plain)
+        print(f"{name} x{count}: {plain_size / 1e6:.2f}MB -> {slotted_size / 1e6:.2f}MB "
+              f"({1 - slotted_size / plain_size:.0%} less), {plain_allocs} -> {slotted_allocs} live allocations, "
+              f"{plain_time * 1000:.1f}ms -> {slotted_time * 1000:.1f}ms")
@@ -0,0 +1,61 @@
+"""Per-tick cost and parity of RollingWindow against the list + np.std STARFRUIT features.
+
+Run from the repo root: python -m benchmarks.rolling_window [day]
+"""
+import sys
+import time
+
+import numpy as np
+
+from backtester import load_day
+from trader import RingBuffer, RollingWindow
+
+
+def list_features(prices: list[float]) -> list[float]:
+    # The features Trader.predict_returns computed from prev_mid_price[-1..-6] before RollingWindow
+    m1, m2, m3, m4, m5, m6 = prices[-1], prices[-2], prices[-3], prices[-4], prices[-5], prices[-6]
+    r1 = m1/m2-1
+    r2 = m2/m3-1
+    r3 = m3/m4-1
+    r4 = m4/m5-1
+    r5 = m5/m6-1
+    return [r1, r2, r3, r4, r5, np.std([r1, r2, r3, r4, r5])]
+
+
+def window_features(prices: RingBuffer, returns: RollingWindow, mid_price: float) -> list[float] | None:
+    if len(prices):
+        returns.append(mid_price / prices[-1] - 1)
+    prices.append(mid_price)
+    if len(returns) < 5:
+        return None
+    return [returns[-1], returns[-2], returns[-3], returns[-4], returns[-5], returns.std()]
+
+
+if __name__ == "__main__":
+    day = int(sys.argv[1]) if len(sys.argv) > 1 else -2
+    data = load_day(1, day)
+    mids = [data.mid_prices[timestamp]["STARFRUIT"] for timestamp in data.timestamps]
+
+    start = time.perf_counter()
+    history = []
+    expected = []
+    for mid_price in mids:
+        history.append(mid_price)
+        if len(history) >= 6:
+            expected.append(list_features(history))
+    list_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    prices = RingBuffer(7)
+    returns = RollingWindow(5)
+    actual = []
+    for mid_price in mids:
+        features = window_features(prices, returns, mid_price)
+        if features is not None:
+            actual.append(features)
+    window_time = time.perf_counter() - start
+
+    expected = np.array(expected)
+    actual = np.array(actual)
+    print(f"{len(mids)} ticks, max |difference| per feature: {np.abs(expected - actual).max(axis=0)}")
+    print(f"list + np.std: {list_time / len(mids) * 1e6:.2f}us/tick, RollingWindow: {window_time / len(mids) * 1e6:.2f}us/tick")
@@ -0,0 +1,169 @@
+"""Throughput, latency and allocations of each Trader on a fixed corpus of recorded states.
+
+The corpus is the first --ticks states of round-1 day -2 (books, the previous tick's market
+trades and the positions trader.py held in the backtest) plus every state in the backtest
+logs. States are built once and fed to each trader in order, threading its own traderData.
+Each run is appended to benchmarks/results.jsonl with the current commit and its corpus settings,
+and the command exits non-zero when a trader got slower by more than --threshold than the median
+of the stored runs with the same settings, so neither one noisy run nor a series of slightly
+slower ones moves the baseline.
+
+Run from the repo root: python -m benchmarks.traders [trader.py ...] [--ticks 2000] [--repeat 3] [--save] [--threshold 0.2]
+"""
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+import numpy as np
+
+from backtester import copy_state, day_states, load_day, load_trader, run_backtest
+from datacache import DATA_DIR
+from datamodel import TradingState
+from logparser import load_states
+
+TRADERS = ["trader.py", "submittedRound1.py", "stanford.py", "t.py"]
+RESULTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results.jsonl")
+
+
+def data_corpus(day: int, ticks: int) -> list[TradingState]:
+    data = load_day(1, day)
+    data.timestamps = data.timestamps[:ticks]
+    # Positions come from replaying trader.py, so the states look like a live session
+    return day_states(data, run_backtest(load_trader(os.path.join(DATA_DIR, "trader.py"))(), data).positions)
+
+
+def replay(trader_file: str, states: list[TradingState], trace: bool = False) -> tuple[list[int], int, int]:
+    """Per-tick run() latencies in ns; with trace, also the peak traced bytes of a tick and the blocks left alive."""
+    trader = load_trader(trader_file)()
+    clock = time.perf_counter_ns
+    latencies = []
+    peak = 0
+    trader_data = ""
+    with open(os.devnull, "w") as sink, redirect_stdout(sink):
+        if trace:
+            tracemalloc.start()
+            blocks = sys.getallocatedblocks()
+        for state in states:
+            state = copy_state(state, trader_data)
+            if trace:
+                tracemalloc.reset_peak()
+            start = clock()
+            _, _, trader_data = trader.run(state)
+            latencies.append(clock() - start)
+            if trace:
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+        retained = 0
+        if trace:
+            retained = sys.getallocatedblocks() - blocks
+            tracemalloc.stop()
+    return latencies, peak, retained
+
+
+def measure(trader_file: str, states: list[TradingState], repeat: int = 3) -> dict:
+    # Each tick keeps its fastest time over the replays, which filters out the rest of the machine
+    try:
+        latencies = np.min([replay(trader_file, states)[0] for _ in range(repeat)], axis=0)
+        _, peak, retained = replay(trader_file, states, trace=True)
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+    values = latencies / 1000
+    return {
+        "ticks": len(values),
+        "ticks_per_sec": len(values) / values.sum() * 1e6,
+        "mean_us": float(values.mean()),
+        "p50_us": float(np.percentile(values, 50)),
+        "p99_us": float(np.percentile(values, 99)),
+        "max_us": float(values.max()),
+        "peak_tick_kb": peak / 1024,
+        "retained_blocks": retained,
+    }
+
+
+def current_commit() -> str:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                                cwd=DATA_DIR).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True,
+                               cwd=DATA_DIR).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def baseline_results(path: str, settings: dict) -> tuple[dict[str, dict], int]:
+    """Median throughput and p50 of each trader/corpus over the stored runs made with the same settings."""
+    runs = []
+    if os.path.exists(path):
+        with open(path) as f:
+            runs = [run for run in map(json.loads, filter(str.strip, f)) if run.get("settings") == settings]
+    baseline = {}
+    for key in {key for run in runs for key in run["results"]}:
+        measured = [run["results"][key] for run in runs if "error" not in run["results"].get(key, {"error": None})]
+        if measured:
+            baseline[key] = {"ticks_per_sec": float(np.median([result["ticks_per_sec"] for result in measured])),
+                             "p50_us": float(np.median([result["p50_us"] for result in measured]))}
+    return baseline, len(runs)
+
+
+def regressions(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Traders that lost more than threshold of their throughput or median latency, or started failing."""
+    found = []
+    for key, result in results.items():
+        before = baseline.get(key)
+        if before is None or "error" in before:
+            continue
+        if "error" in result:
+            found.append(f"{key}: now fails with {result['error']}")
+            continue
+        if result["ticks_per_sec"] < before["ticks_per_sec"] * (1 - threshold):
+            found.append(f"{key}: {before['ticks_per_sec']:,.0f} -> {result['ticks_per_sec']:,.0f} ticks/sec")
+        if result["p50_us"] > before["p50_us"] * (1 + threshold):
+            found.append(f"{key}: p50 {before['p50_us']:.1f} -> {result['p50_us']:.1f}us")
+    return found
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Trader.run on recorded states")
+    parser.add_argument("traders", nargs="*", default=TRADERS)
+    parser.add_argument("--ticks", type=int, default=2000, help="round-1 day -2 ticks in the corpus")
+    parser.add_argument("--repeat", type=int, default=3, help="replays per trader and corpus; each tick's fastest is kept")
+    parser.add_argument("--save", action="store_true", help=f"append this run to {RESULTS}")
+    parser.add_argument("--results", default=RESULTS)
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative slowdown before failing")
+    args = parser.parse_args()
+
+    corpora = {"round1": data_corpus(-2, args.ticks)}
+    for path in sorted(glob.glob(os.path.join(DATA_DIR, "backtests", "*.log"))):
+        corpora["log:" + os.path.basename(path)] = load_states(path)
+    # Runs are only compared with runs over the same states
+    settings = {"ticks": args.ticks, "corpora": {name: len(states) for name, states in corpora.items()}}
+
+    results = {}
+    for trader_file in args.traders:
+        for name, states in corpora.items():
+            key = f"{os.path.basename(trader_file)} {name}"
+            results[key] = result = measure(os.path.join(DATA_DIR, trader_file), states, args.repeat)
+            if "error" in result:
+                print(f"{key:<45} {result['error']}")
+            else:
+                print(f"{key:<45} {result['ticks_per_sec']:>8,.0f} ticks/s  p50 {result['p50_us']:>7.1f}us  "
+                      f"p99 {result['p99_us']:>7.1f}us  max {result['max_us']:>8.1f}us  "
+                      f"peak {result['peak_tick_kb']:>6.1f}KB/tick  retained {result['retained_blocks']} blocks")
+
+    baseline, runs = baseline_results(args.results, settings)
+    found = regressions(results, baseline, args.threshold)
+    if args.save:
+        with open(args.results, "a") as f:
+            f.write(json.dumps({"commit": current_commit(), "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+                                "settings": settings, "results": results}) + "\n")
+    if found:
+        print(f"Regressions against the median of {runs} stored runs (threshold {args.threshold:.0%}):")
+        for line in found:
+            print("  " + line)
+        sys.exit(1)
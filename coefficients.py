@@ -1,55 +1,216 @@
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LinearRegression
-from sklearn.metrics import mean_squared_error
-from sklearn.impute import SimpleImputer
+"""Fits the STARFRUIT return model used by Trader.predict_returns.
 
-price_data = pd.read_csv('round-1-island-data-bottle/prices_round_1_day_0.csv', delimiter=';', parse_dates=['timestamp'])
-price_data1 = pd.read_csv('round-1-island-data-bottle/prices_round_1_day_-1.csv', delimiter=';', parse_dates=['timestamp'])
-price_data2 = pd.read_csv('round-1-island-data-bottle/prices_round_1_day_-2.csv', delimiter=';', parse_dates=['timestamp'])
+The model regresses the next mid-price return on the last five returns and their (population)
+standard deviation, exactly the inputs predict_returns sees live. Each day is read from the
+column cache and folded into running X^T X / X^T y sums, so memory does not grow with the number
+of days, and the fit is the closed-form least-squares solution of those sums.
 
-price_data1 = price_data1.drop(price_data1.index[0])
-price_data2 = price_data2.drop(price_data2.index[0])
-price_data = pd.concat([price_data1,price_data,price_data2])
-price_data = price_data.drop(columns=['day'])
-price_data = price_data[price_data['product'] == 'STARFRUIT']
+    python coefficients.py [--product STARFRUIT] [--trader trader.py] [round:day ...]
 
-price_data['m1'] = price_data['mid_price'].shift(1)
-price_data['m2'] = price_data['mid_price'].shift(2)
-price_data['m3'] = price_data['mid_price'].shift(3)
+With no days given every cached prices file that lists the product is used. The fit is printed
+as Trader's starfruit_coefs, starfruit_intercept and starfruit_rls_prior constants; --trader
+rewrites those constants in the given file instead, so the file that gets uploaded is the file that was
+backtested. A candidate fit can be backtested without touching the file by sweeping the
+constants (sweep.py trader.py "starfruit_coefs=[...]").
+"""
+import argparse
+import glob
+import os
+import re
+import time
 
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 
-price_data.columns = [col.strip() for col in price_data.columns] 
-#remove first three rows
-price_data = price_data.drop(price_data.index[1:4])
+from datacache import DATA_DIR, load_csv
+from observations import load_columns
 
-price_data['future_price'] = price_data['mid_price']
-price_data['returns'] = price_data['future_price']
-price_data.dropna(subset=['returns'], inplace=True)
+RETURN_LAGS = 5
+FEATURE_NAMES = [f"r{lag}" for lag in range(1, RETURN_LAGS + 1)] + ["std"]
 
-imputer = SimpleImputer(strategy='mean')
-price_data[['m1', 'm2', 'm3']] = imputer.fit_transform(price_data[['m1', 'm2', 'm3']])
-features = ['m1', 'm2', 'm3']
-X = price_data[features]
-y = price_data['returns']
 
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2)
+class NormalEquations:
+    """Running sufficient statistics of a linear regression with intercept."""
 
+    def __init__(self, n_features: int) -> None:
+        # Column 0 of the design is the intercept
+        self.xtx = np.zeros((n_features + 1, n_features + 1))
+        self.xty = np.zeros(n_features + 1)
+        self.yty = 0.0
+        self.y_sum = 0.0
+        self.rows = 0
 
-model = LinearRegression()
-model.fit(X_train, y_train)
+    def add(self, x: np.ndarray, y: np.ndarray) -> None:
+        design = np.empty((len(x), x.shape[1] + 1))
+        design[:, 0] = 1.0
+        design[:, 1:] = x
+        self.xtx += design.T @ design
+        self.xty += design.T @ y
+        self.yty += float(y @ y)
+        self.y_sum += float(y.sum())
+        self.rows += len(y)
 
+    def merge(self, other: "NormalEquations") -> "NormalEquations":
+        merged = NormalEquations(len(self.xty) - 1)
+        merged.xtx = self.xtx + other.xtx
+        merged.xty = self.xty + other.xty
+        merged.yty = self.yty + other.yty
+        merged.y_sum = self.y_sum + other.y_sum
+        merged.rows = self.rows + other.rows
+        return merged
 
-y_pred = model.predict(X_test)
-mse = mean_squared_error(y_test, y_pred)
-print('Mean Squared Error:', mse)
-print('R^2 Score:', model.score(X_test, y_test)) 
+    def solve(self) -> np.ndarray:
+        """Intercept followed by the feature coefficients; falls back to the minimum-norm solution if X^T X is singular."""
+        try:
+            return np.linalg.solve(self.xtx, self.xty)
+        except np.linalg.LinAlgError:
+            return np.linalg.lstsq(self.xtx, self.xty, rcond=None)[0]
 
+    def sse(self, beta: np.ndarray) -> float:
+        # sum (y - X b)^2 = y'y - 2 b'X'y + b'X'X b
+        return max(self.yty - 2 * float(beta @ self.xty) + float(beta @ self.xtx @ beta), 0.0)
 
-coefficients = model.coef_ 
-intercept = model.intercept_ 
+    def mse(self, beta: np.ndarray) -> float:
+        return self.sse(beta) / self.rows if self.rows else float("nan")
 
-features = ['m1', 'm2', 'm3']
-for feature, coef in zip(features, coefficients):
-    print(f"{feature}: {coef}")
-print("intercept:", intercept)
+    def r2(self, beta: np.ndarray) -> float:
+        total = self.yty - self.y_sum * self.y_sum / self.rows if self.rows else 0.0
+        return 1 - self.sse(beta) / total if total > 0 else float("nan")
+
+    def rls_prior(self) -> list[float]:
+        """Upper triangle, row by row, of (X^T X)^-1 with the intercept moved last, as Trader's RLS orders it.
+
+        The coefficients' covariance is sigma^2 (X^T X)^-1 and RLS measures P in units of the
+        noise variance, so RLS started from the fit with this P carries on as if it had been fed
+        the training rows: each new tick moves the coefficients by about one row's worth.
+        """
+        inverse = np.linalg.pinv(self.xtx)
+        order = list(range(1, len(self.xty))) + [0]
+        inverse = inverse[np.ix_(order, order)]
+        return inverse[np.triu_indices(len(order))].tolist()
+
+
+def tick_returns(mid_prices: np.ndarray) -> np.ndarray:
+    """Return into each tick from the one before; tick 0 has none and is NaN."""
+    returns = np.empty(len(mid_prices))
+    returns[:1] = np.nan
+    returns[1:] = mid_prices[1:] / mid_prices[:-1] - 1
+    return returns
+
+
+def lagged_return(returns: np.ndarray, lag: int) -> np.ndarray:
+    """The return lag ticks back as seen on each tick (lag 1 is the tick's own return), NaN before it exists."""
+    values = np.full(len(returns), np.nan)
+    values[lag - 1:] = returns[:len(returns) - lag + 1]
+    return values
+
+
+def return_std(returns: np.ndarray, window: int) -> np.ndarray:
+    """Population std of the last window returns on each tick, NaN until window returns exist."""
+    values = np.full(len(returns), np.nan)
+    if len(returns) > window:
+        values[window:] = sliding_window_view(returns[1:], window).std(axis=1)
+    return values
+
+
+def return_features(mid_prices: np.ndarray, lags: int = RETURN_LAGS) -> tuple[np.ndarray, np.ndarray]:
+    """Rows of [r1..r_lags, std] with the next tick's return as target, r1 being the newest return."""
+    returns = tick_returns(mid_prices)
+    x = np.column_stack([lagged_return(returns, lag) for lag in range(1, lags + 1)] + [return_std(returns, lags)])[:-1]
+    y = returns[1:]
+    valid = np.isfinite(x).all(axis=1) & np.isfinite(y)
+    return x[valid], y[valid]
+
+
+def available_days(product: str, data_dir: str = DATA_DIR) -> list[tuple[int, int]]:
+    """(round, day) of every prices file that has the product, as a book (round 1) or a price column (round 2)."""
+    days = []
+    for path in glob.glob(os.path.join(data_dir, "round-*-island-data-bottle", "prices_round_*_day_*.csv")):
+        match = re.search(r"prices_round_(\d+)_day_(-?\d+)\.csv$", path)
+        table = load_csv(path)
+        if product in table.categories.get("product", ()) or product in table.columns:
+            days.append((int(match.group(1)), int(match.group(2))))
+    return sorted(days)
+
+
+def accumulate(product: str, days: list[tuple[int, int]], data_dir: str = DATA_DIR) -> dict[tuple[int, int], NormalEquations]:
+    """Sufficient statistics per (round, day); days are never concatenated, so no return spans two days."""
+    from backtester import prices_path
+
+    stats = {}
+    for round_num, day in days:
+        mid_prices = load_columns(prices_path(round_num, day, data_dir)).prices[product]
+        x, y = return_features(mid_prices)
+        stats[(round_num, day)] = NormalEquations(x.shape[1])
+        stats[(round_num, day)].add(x, y)
+    return stats
+
+
+def fit(product: str, days: list[tuple[int, int]], data_dir: str = DATA_DIR) -> dict:
+    total = NormalEquations(len(FEATURE_NAMES))
+    for stats in accumulate(product, days, data_dir).values():
+        total = total.merge(stats)
+    beta = total.solve()
+    return {
+        "features": FEATURE_NAMES,
+        "coef": beta[1:].tolist(),
+        "intercept": float(beta[0]),
+        "days": [f"{round_num}:{day}" for round_num, day in days],
+        "rows": total.rows,
+        "r2": total.r2(beta),
+        "mse": total.mse(beta),
+        "rls_prior": total.rls_prior(),
+    }
+
+
+def list_constant(name: str, values: list[float], indent: str = "") -> str:
+    prefix = f"{indent}{name} = ["
+    values = [repr(value) for value in values]
+    lines = [", ".join(values[i:i + 4]) for i in range(0, len(values), 4)]
+    return prefix + (",\n" + " " * len(prefix)).join(lines) + "]\n"
+
+
+def trader_constants(model: dict, indent: str = "") -> str:
+    """The starfruit_coefs, starfruit_intercept and starfruit_rls_prior lines of Trader for the model."""
+    return (list_constant("starfruit_coefs", model["coef"], indent)
+            + f"{indent}starfruit_intercept = {model['intercept']!r}\n"
+            + list_constant("starfruit_rls_prior", model["rls_prior"], indent))
+
+
+def write_trader_constants(path: str, model: dict) -> None:
+    """Replace the starfruit_coefs, starfruit_intercept and starfruit_rls_prior class constants of a trader file."""
+    with open(path) as f:
+        source = f.read()
+    pattern = re.compile(r"^( *)starfruit_coefs = \[[^\]]*\]\n\1starfruit_intercept = [^\n]*\n"
+                         r"\1starfruit_rls_prior = \[[^\]]*\]\n", re.M)
+    match = pattern.search(source)
+    if match is None:
+        raise ValueError(f"{path} has no starfruit_coefs / starfruit_intercept / starfruit_rls_prior constants")
+    replacement = trader_constants(model, match.group(1))
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(source[:match.start()] + replacement + source[match.end():])
+    os.replace(tmp_path, path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("days", nargs="*", help="round:day pairs, e.g. 1:-2 (default: every day listing the product)")
+    parser.add_argument("--product", default="STARFRUIT")
+    parser.add_argument("--trader", default=None, help="trader file whose STARFRUIT constants are rewritten with the fit")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    days = [tuple(map(int, day.split(":"))) for day in args.days] or available_days(args.product)
+    model = fit(args.product, days)
+    if args.trader and args.product == "STARFRUIT":
+        write_trader_constants(args.trader, model)
+    elapsed = time.perf_counter() - start
+
+    for name, coef in zip(model["features"], model["coef"]):
+        print(f"{name}: {coef}")
+    print("intercept:", model["intercept"])
+    print(f"{model['rows']} rows from {len(days)} days, R^2 {model['r2']:.4f}, MSE {model['mse']:.3e} "
+          f"({elapsed * 1000:.0f}ms)" + (f" -> {args.trader}" if args.trader and args.product == "STARFRUIT" else ""))
+    if not args.trader:
+        print(trader_constants(model), end="")
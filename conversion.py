@@ -0,0 +1,182 @@
+"""ORCHIDS conversion arbitrage: trade the local book against the South archipelago's conversion prices.
+
+Each tick's ConversionObservation gives the South's bid and ask plus the fees and tariffs of
+moving goods across. Importing a unit (conversions > 0) costs askPrice + transportFees +
+importTariff; exporting one (conversions < 0) earns bidPrice - transportFees - exportTariff.
+A local bid above the import price is sold into and the short is covered by importing on the
+next tick; a local ask below the export price (less a tick of storage) is bought and exported.
+arbitrage_orders() makes that decision in O(1) per tick; evaluate() scores a whole day for any
+number of thresholds in one array pass.
+
+The round-2 prices files have a single ORCHIDS price per tick and no local book. The South's
+quote is the one the backtester sends (observations.ObservationColumns, ORCHIDS -/+
+south_half_spread), and ArbitrageDay derives the local book from the same price: floor/ceil of
+ORCHIDS -/+ local_half_spread with local_volume at the touch.
+
+    python conversion.py [days...] [--thresholds 0 0.5 1 2 3] [--south-half-spread 0.5] [--local-half-spread 1.5]
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+
+from backtester import prices_path
+from datamodel import ConversionObservation, Order, OrderDepth, Symbol
+from observations import SOUTH_HALF_SPREAD, load_columns
+
+PRODUCT = "ORCHIDS"
+POSITION_LIMIT = 100
+# Charged per unit of long inventory per tick; shorts are free
+STORAGE_COST = 0.1
+
+
+def import_price(observation: ConversionObservation) -> float:
+    """Cost of buying one unit from the South."""
+    return observation.askPrice + observation.transportFees + observation.importTariff
+
+
+def export_price(observation: ConversionObservation) -> float:
+    """Proceeds of selling one unit to the South."""
+    return observation.bidPrice - observation.transportFees - observation.exportTariff
+
+
+def arbitrage_orders(product: Symbol, observation: ConversionObservation, order_depth: OrderDepth, position: int,
+                     threshold: float = 0.0, limit: int = POSITION_LIMIT) -> tuple[list[Order], int]:
+    """Local orders and the conversion count for one tick.
+
+    The conversion flattens the inventory the previous tick's orders left, and the exchange
+    applies it before matching, so the orders are sized against a flat position. Only levels
+    whose edge over this tick's conversion price is above threshold are taken.
+    """
+    conversions = max(-limit, min(limit, -position))
+    orders = []
+
+    cost = import_price(observation) + threshold
+    capacity = limit
+    for price, volume in sorted(order_depth.buy_orders.items(), reverse=True):
+        if price <= cost or capacity <= 0:
+            break
+        quantity = min(volume, capacity)
+        orders.append(Order(product, price, -quantity))
+        capacity -= quantity
+
+    proceeds = export_price(observation) - STORAGE_COST - threshold
+    capacity = limit
+    for price, volume in sorted(order_depth.sell_orders.items()):
+        if price >= proceeds or capacity <= 0:
+            break
+        quantity = min(-volume, capacity)
+        orders.append(Order(product, price, quantity))
+        capacity -= quantity
+
+    return orders, conversions
+
+
+class ArbitrageDay:
+    """One round-2 day as arrays: the South's conversion prices and a local book derived from ORCHIDS."""
+
+    def __init__(self, round_num: int, day: int, south_half_spread: float = SOUTH_HALF_SPREAD,
+                 local_half_spread: float = 1.5, local_volume: int = 10) -> None:
+        columns = load_columns(prices_path(round_num, day), south_half_spread)
+        self.timestamps = columns.timestamps
+        price = columns.prices[PRODUCT]
+        self.observations = observations = columns.observations
+        self.south_bid = observations.bid_prices(PRODUCT)
+        self.south_ask = observations.ask_prices(PRODUCT)
+        self.transport_fees = observations.column(PRODUCT, "transportFees")
+        self.export_tariff = observations.column(PRODUCT, "exportTariff")
+        self.import_tariff = observations.column(PRODUCT, "importTariff")
+        self.sunlight = observations.column(PRODUCT, "sunlight")
+        self.humidity = observations.column(PRODUCT, "humidity")
+        self.local_bid = np.floor(price - local_half_spread).astype(np.int64)
+        self.local_ask = np.ceil(price + local_half_spread).astype(np.int64)
+        self.local_volume = np.full(len(price), local_volume, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def import_prices(self) -> np.ndarray:
+        return self.south_ask + self.transport_fees + self.import_tariff
+
+    def export_prices(self) -> np.ndarray:
+        return self.south_bid - self.transport_fees - self.export_tariff
+
+    def observation(self, i: int) -> ConversionObservation:
+        # The ConversionObservation a backtest of this day sends on tick i
+        return self.observations[i].conversionObservations[PRODUCT]
+
+    def order_depth(self, i: int) -> OrderDepth:
+        depth = OrderDepth()
+        depth.buy_orders = {int(self.local_bid[i]): int(self.local_volume[i])}
+        depth.sell_orders = {int(self.local_ask[i]): -int(self.local_volume[i])}
+        return depth
+
+
+def evaluate(day: ArbitrageDay, thresholds: list[float] | np.ndarray, limit: int = POSITION_LIMIT) -> dict[str, np.ndarray]:
+    """PnL, trading ticks and volume of taking the local touch at each threshold, assuming every take fills.
+
+    A tick trades when its edge over the current conversion price beats the threshold, and is
+    realised at the next tick's price, when the conversion goes through. The last tick has no
+    next tick and never trades.
+    """
+    thresholds = np.asarray(thresholds, dtype=np.float64)[:, None]
+    imports, exports = day.import_prices(), day.export_prices()
+    volume = np.minimum(day.local_volume[:-1], limit)
+
+    sell_edge = day.local_bid[:-1] - imports[:-1]
+    buy_edge = exports[:-1] - day.local_ask[:-1] - STORAGE_COST
+    sells = sell_edge > thresholds
+    buys = buy_edge > thresholds
+    realised = np.where(sells, (day.local_bid[:-1] - imports[1:]) * volume, 0.0)
+    realised += np.where(buys, (exports[1:] - day.local_ask[:-1] - STORAGE_COST) * volume, 0.0)
+    return {
+        "threshold": thresholds[:, 0],
+        "pnl": realised.sum(axis=1),
+        "ticks": (sells | buys).sum(axis=1),
+        "volume": ((sells | buys) * volume).sum(axis=1),
+    }
+
+
+def replay(day: ArbitrageDay, threshold: float, limit: int = POSITION_LIMIT) -> float:
+    """PnL of calling arbitrage_orders on every tick with takes filling in full, the loop evaluate() vectorises."""
+    cash = 0.0
+    position = 0
+    for i in range(len(day)):
+        observation = day.observation(i)
+        orders, conversions = arbitrage_orders(PRODUCT, observation, day.order_depth(i), position, threshold, limit)
+        cash -= conversions * (import_price(observation) if conversions > 0 else export_price(observation))
+        position += conversions
+        if i == len(day) - 1:
+            break
+        for order in orders:
+            cash -= order.price * order.quantity
+            position += order.quantity
+        cash -= STORAGE_COST * max(position, 0)
+    return cash
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score ORCHIDS conversion arbitrage over round-2 days")
+    parser.add_argument("days", nargs="*", type=int, default=[-1, 0, 1])
+    parser.add_argument("--thresholds", nargs="+", type=float, default=[0, 0.5, 1, 2, 3])
+    parser.add_argument("--south-half-spread", type=float, default=SOUTH_HALF_SPREAD)
+    parser.add_argument("--local-half-spread", type=float, default=1.5)
+    parser.add_argument("--local-volume", type=int, default=10)
+    args = parser.parse_args()
+
+    for day_num in args.days:
+        day = ArbitrageDay(2, day_num, args.south_half_spread, args.local_half_spread, args.local_volume)
+        start = time.perf_counter()
+        scores = evaluate(day, args.thresholds)
+        elapsed = time.perf_counter() - start
+        print(f"Day {day_num}: {len(day)} ticks x {len(args.thresholds)} thresholds in {elapsed * 1000:.1f}ms")
+        for threshold, pnl, ticks, volume in zip(scores["threshold"], scores["pnl"], scores["ticks"], scores["volume"]):
+            print(f"  threshold {threshold:>5.1f}  PnL {pnl:>12,.1f}  ticks {ticks:>6}  volume {volume:>7}")
+
+        # The vectorised score must equal the per-tick decision loop
+        start = time.perf_counter()
+        looped = replay(day, args.thresholds[0])
+        elapsed = time.perf_counter() - start
+        assert math.isclose(looped, scores["pnl"][0], rel_tol=1e-9, abs_tol=1e-6), (looped, scores["pnl"][0])
+        print(f"  per-tick replay at threshold {args.thresholds[0]}: PnL {looped:,.1f} ({elapsed * 1000:.0f}ms)")
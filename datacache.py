@@ -0,0 +1,181 @@
+import csv
+import glob
+import json
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+# Empty integer cells (missing book levels, absent rows) are stored as MISSING; empty float cells as NaN
+MISSING = np.iinfo(np.int32).min
+MAGIC = b"PCOL1\n"
+ALIGN = 64
+
+
+class Table:
+    """Columns of one CSV file as read-only NumPy arrays.
+
+    Numeric columns are int32/int64/float64 arrays. Text columns (product, symbol, buyer, ...)
+    are int16 codes into categories[name].
+    """
+
+    def __init__(self, columns: dict[str, np.ndarray], categories: dict[str, list[str]]) -> None:
+        self.columns = columns
+        self.categories = categories
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def code(self, name: str, value: str) -> int:
+        return self.categories[name].index(value)
+
+    def mask(self, name: str, value: str) -> np.ndarray:
+        return self.columns[name] == self.code(name, value)
+
+    def decode(self, name: str) -> list[str]:
+        categories = self.categories[name]
+        return [categories[code] for code in self.columns[name]]
+
+
+def cache_path(path: str, cache_dir: str | None = None) -> str:
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(path)), ".cache")
+    return os.path.join(cache_dir, os.path.basename(path) + ".col")
+
+
+def parse_column(values: list[str]) -> tuple[np.ndarray, list[str] | None]:
+    filled = [value for value in values if value != ""]
+    if values and not filled:
+        return np.zeros(len(values), dtype=np.int16), [""]
+
+    try:
+        ints = [int(value) for value in filled]
+        dtype = np.int32 if all(MISSING < value <= np.iinfo(np.int32).max for value in ints) else np.int64
+        column = np.array([MISSING if value == "" else int(value) for value in values], dtype=dtype)
+        return column, None
+    except ValueError:
+        pass
+
+    try:
+        floats = [float(value) for value in filled]
+        # Trade prices are written as "5047.0"; keep them integral
+        if floats and all(value.is_integer() and abs(value) < 2**31 for value in floats):
+            return np.array([MISSING if value == "" else int(float(value)) for value in values], dtype=np.int32), None
+        return np.array([np.nan if value == "" else float(value) for value in values], dtype=np.float64), None
+    except ValueError:
+        pass
+
+    categories = sorted(set(values))
+    codes = {value: i for i, value in enumerate(categories)}
+    return np.array([codes[value] for value in values], dtype=np.int16), categories
+
+
+def convert(path: str, target: str) -> None:
+    """Parse a ;-delimited CSV once and write it as an aligned columnar file."""
+    with open(path, newline="") as f:
+        reader = csv.reader(f, delimiter=";")
+        names = [name.strip() for name in next(reader)]
+        rows = [row for row in reader if row]
+
+    header_columns = []
+    arrays = []
+    offset = 0
+    for i, name in enumerate(names):
+        array, categories = parse_column([row[i] if i < len(row) else "" for row in rows])
+        entry = {"name": name, "dtype": array.dtype.str, "offset": offset}
+        if categories is not None:
+            entry["categories"] = categories
+        header_columns.append(entry)
+        arrays.append(array)
+        offset += -(-array.nbytes // ALIGN) * ALIGN
+
+    stat = os.stat(path)
+    header = json.dumps({
+        "source_size": stat.st_size,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "rows": len(rows),
+        "columns": header_columns,
+    }).encode()
+    prefix_length = len(MAGIC) + 8 + len(header)
+    data_start = -(-prefix_length // ALIGN) * ALIGN
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = target + f".{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", data_start))
+        f.write(header)
+        f.write(b"\0" * (data_start - prefix_length))
+        for entry, array in zip(header_columns, arrays):
+            f.seek(data_start + entry["offset"])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp, target)
+
+
+def read_header(target: str) -> tuple[int, dict] | None:
+    try:
+        with open(target, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            data_start = struct.unpack("<Q", f.read(8))[0]
+            raw = f.read(data_start - len(MAGIC) - 8).rstrip(b"\0")
+            return data_start, json.loads(raw)
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def load_csv(path: str, cache_dir: str | None = None) -> Table:
+    """Load a prices_/trades_ CSV through the columnar cache, rebuilding it if the CSV changed."""
+    target = cache_path(path, cache_dir)
+    stat = os.stat(path)
+    header = read_header(target)
+    if header is None or header[1]["source_size"] != stat.st_size or header[1]["source_mtime_ns"] != stat.st_mtime_ns:
+        convert(path, target)
+        header = read_header(target)
+
+    data_start, meta = header
+    rows = meta["rows"]
+    columns = {}
+    categories = {}
+    if os.path.getsize(target) > data_start:
+        buffer = np.memmap(target, dtype=np.uint8, mode="r")
+        for entry in meta["columns"]:
+            dtype = np.dtype(entry["dtype"])
+            start = data_start + entry["offset"]
+            columns[entry["name"]] = buffer[start:start + rows * dtype.itemsize].view(dtype)
+    else:
+        for entry in meta["columns"]:
+            columns[entry["name"]] = np.empty(0, dtype=entry["dtype"])
+    for entry in meta["columns"]:
+        if "categories" in entry:
+            categories[entry["name"]] = entry["categories"]
+
+    return Table(columns, categories)
+
+
+def load_round(round_num: int, data_dir: str = DATA_DIR, cache_dir: str | None = None) -> dict[str, Table]:
+    """All prices_/trades_ files of a round, keyed by file name without extension."""
+    pattern = os.path.join(data_dir, f"round-{round_num}-island-data-bottle", "*.csv")
+    return {os.path.splitext(os.path.basename(path))[0]: load_csv(path, cache_dir) for path in sorted(glob.glob(pattern))}
+
+
+if __name__ == "__main__":
+    rounds = [int(arg) for arg in sys.argv[1:]] or [1, 2]
+    for round_num in rounds:
+        load_round(round_num)
+
+    start = time.perf_counter()
+    tables = {}
+    for round_num in rounds:
+        tables.update(load_round(round_num))
+    elapsed = time.perf_counter() - start
+
+    for name, table in tables.items():
+        print(f"{name}: {len(table)} rows, {len(table.columns)} columns")
+    print(f"Loaded {len(tables)} files in {elapsed * 1000:.2f}ms")
@@ -1,4 +1,6 @@
 import json
+from bisect import bisect_left
+from itertools import accumulate
 from typing import Dict, List
 from json import JSONEncoder
 import jsonpickle
@@ -12,6 +14,7 @@ ObservationValue = int
 
 
 class Listing:
+    __slots__ = ("symbol", "product", "denomination")
 
     def __init__(self, symbol: Symbol, product: Product, denomination: Product):
         self.symbol = symbol
@@ -20,6 +23,7 @@ class Listing:
         
                  
 class ConversionObservation:
+    __slots__ = ("bidPrice", "askPrice", "transportFees", "exportTariff", "importTariff", "sunlight", "humidity")
 
     def __init__(self, bidPrice: float, askPrice: float, transportFees: float, exportTariff: float, importTariff: float, sunlight: float, humidity: float):
         self.bidPrice = bidPrice
@@ -42,6 +46,7 @@ class Observation:
      
 
 class Order:
+    __slots__ = ("symbol", "price", "quantity")
 
     def __init__(self, symbol: Symbol, price: int, quantity: int) -> None:
         self.symbol = symbol
@@ -62,7 +67,155 @@ class OrderDepth:
         self.sell_orders: Dict[int, int] = {}
 
 
+class BookSide(dict):
+    """price -> volume dict that keeps its levels sorted best first.
+
+    The dict's own insertion order is kept in sync with the parallel prices/volumes lists,
+    so plain iteration, items() and json.dumps all see the levels best first.
+    """
+
+    def __init__(self, orders: Dict[int, int] = None, descending: bool = False) -> None:
+        super().__init__()
+        self.descending = descending
+        self.prices: List[int] = sorted(orders, reverse=descending) if orders else []
+        self.volumes: List[int] = [orders[price] for price in self.prices]
+        self._cumulative: List[int] = None
+        dict.update(self, zip(self.prices, self.volumes))
+
+    def _index(self, price: int) -> int:
+        # Bids are stored descending, so search on the negated price
+        key = -price if self.descending else price
+        return bisect_left(self.prices, key, key=(lambda p: -p) if self.descending else None)
+
+    def _reorder(self) -> None:
+        dict.clear(self)
+        for price, volume in zip(self.prices, self.volumes):
+            dict.__setitem__(self, price, volume)
+
+    def __setitem__(self, price: int, volume: int) -> None:
+        self._cumulative = None
+        if dict.__contains__(self, price):
+            self.volumes[self._index(price)] = volume
+            dict.__setitem__(self, price, volume)
+            return
+
+        i = self._index(price)
+        self.prices.insert(i, price)
+        self.volumes.insert(i, volume)
+        dict.__setitem__(self, price, volume)
+        if i != len(self.prices) - 1:
+            self._reorder()
+
+    def __delitem__(self, price: int) -> None:
+        dict.__delitem__(self, price)
+        i = self._index(price)
+        del self.prices[i]
+        del self.volumes[i]
+        self._cumulative = None
+
+    def pop(self, price: int, *default):
+        if not dict.__contains__(self, price):
+            if default:
+                return default[0]
+            raise KeyError(price)
+        volume = dict.__getitem__(self, price)
+        del self[price]
+        return volume
+
+    def popitem(self):
+        if not self.prices:
+            raise KeyError("popitem(): book side is empty")
+        price = self.prices[-1]
+        return price, self.pop(price)
+
+    def setdefault(self, price: int, default: int = None):
+        if not dict.__contains__(self, price):
+            self[price] = default
+        return dict.__getitem__(self, price)
+
+    def update(self, *args, **kwargs) -> None:
+        for price, volume in dict(*args, **kwargs).items():
+            self[price] = volume
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __or__(self, other):
+        merged = self.copy()
+        merged.update(other)
+        return merged
+
+    @classmethod
+    def fromkeys(cls, prices, volume: int = None, descending: bool = False) -> "BookSide":
+        return cls(dict.fromkeys(prices, volume), descending)
+
+    def clear(self) -> None:
+        dict.clear(self)
+        self.prices.clear()
+        self.volumes.clear()
+        self._cumulative = None
+
+    def copy(self) -> "BookSide":
+        return BookSide(self, self.descending)
+
+    def __reduce__(self):
+        return BookSide, (dict(self), self.descending)
+
+    def best(self) -> int:
+        return self.prices[0] if self.prices else None
+
+    def levels(self):
+        return zip(self.prices, self.volumes)
+
+    def depth(self, levels: int = None) -> int:
+        """Total volume of the best `levels` levels (all levels by default)."""
+        if not self.prices:
+            return 0
+        if self._cumulative is None:
+            self._cumulative = list(accumulate(self.volumes))
+        if levels is None or levels >= len(self._cumulative):
+            return self._cumulative[-1]
+        return self._cumulative[levels - 1] if levels > 0 else 0
+
+
+class SortedOrderDepth(OrderDepth):
+    """Drop-in OrderDepth whose sides are BookSides, sorted best level first."""
+
+    def __init__(self, buy_orders: Dict[int, int] = None, sell_orders: Dict[int, int] = None):
+        self.buy_orders: BookSide = BookSide(buy_orders, descending=True)
+        self.sell_orders: BookSide = BookSide(sell_orders)
+
+    @property
+    def best_bid(self) -> int:
+        return self.buy_orders.best()
+
+    @property
+    def best_ask(self) -> int:
+        return self.sell_orders.best()
+
+    @property
+    def spread(self) -> int:
+        if not self.buy_orders.prices or not self.sell_orders.prices:
+            return None
+        return self.sell_orders.prices[0] - self.buy_orders.prices[0]
+
+    @property
+    def mid_price(self) -> float:
+        if not self.buy_orders.prices or not self.sell_orders.prices:
+            return None
+        return (self.sell_orders.prices[0] + self.buy_orders.prices[0]) / 2
+
+    def bid_depth(self, levels: int = None) -> int:
+        return self.buy_orders.depth(levels)
+
+    def ask_depth(self, levels: int = None) -> int:
+        # Sell volumes are negative, as on the exchange
+        return self.sell_orders.depth(levels)
+
+
 class Trade:
+    __slots__ = ("symbol", "price", "quantity", "buyer", "seller", "timestamp")
 
     def __init__(self, symbol: Symbol, price: int, quantity: int, buyer: UserId=None, seller: UserId=None, timestamp: int=0) -> None:
         self.symbol = symbol
@@ -78,6 +231,11 @@ class Trade:
     def __repr__(self) -> str:
         return "(" + self.symbol + ", " + self.buyer + " << " + self.seller + ", " + str(self.price) + ", " + str(self.quantity) + ", " + str(self.timestamp) + ")"
 
+    @classmethod
+    def batch(cls, symbols, prices, quantities, buyers, sellers, timestamps) -> List["Trade"]:
+        """Build one Trade per row from parallel columns, e.g. a parsed trades CSV."""
+        return list(map(cls, symbols, prices, quantities, buyers, sellers, timestamps))
+
 
 class TradingState(object):
 
@@ -100,10 +258,18 @@ class TradingState(object):
         self.observations = observations
         
     def toJSON(self):
-        return json.dumps(self, default=lambda o: o.__dict__, sort_keys=True)
+        return json.dumps(self, default=to_dict, sort_keys=True)
+
+
+def to_dict(o):
+    # Slotted classes (Order, Trade, Listing, ConversionObservation) have no __dict__
+    slots = getattr(type(o), "__slots__", None)
+    if slots is not None:
+        return {name: getattr(o, name) for name in slots}
+    return o.__dict__
 
     
 class ProsperityEncoder(JSONEncoder):
 
         def default(self, o):
-            return o.__dict__
\ No newline at end of file
+            return to_dict(o)
\ No newline at end of file
@@ -0,0 +1,304 @@
+"""Streaming versions of the indicators prototyped in t.py and round1systematic.ipynb.
+
+Every feature keeps O(1) state per product and is updated once per tick from the product's
+OrderDepth and market trades. Features register themselves by name, so a Trader asks for them
+declaratively:
+
+    engine = FeatureEngine(["spread", "x_vol", ("rip_indicator", {"periods": 10})], ["STARFRUIT"])
+    values = engine.update(state)["STARFRUIT"]   # one float per requested feature, in order
+
+Warm-up values are NaN, matching the pandas rolling/pct_change columns of the notebook.
+"""
+import math
+import sys
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any
+
+from datamodel import BookSide, OrderDepth, Symbol, Trade, TradingState
+
+FEATURES: dict[str, type] = {}
+NAN = float("nan")
+
+
+def feature(name: str):
+    def register(cls: type) -> type:
+        # Checked here so a feature missing an update fails at import, not at the first tick
+        if getattr(cls, "__abstractmethods__", None):
+            raise TypeError(f"feature {name!r} ({cls.__name__}) does not implement {', '.join(sorted(cls.__abstractmethods__))}")
+        cls.name = name
+        FEATURES[name] = cls
+        return cls
+    return register
+
+
+class Book:
+    """Top-of-book values shared by every feature of one product for the current tick."""
+    __slots__ = ("best_bid", "best_ask", "bid_volume", "ask_volume", "bid_levels", "ask_levels", "mid_price", "trade_price")
+
+    def __init__(self) -> None:
+        self.trade_price = NAN
+
+    def update(self, order_depth: OrderDepth, trades: list[Trade]) -> None:
+        buy_orders = order_depth.buy_orders
+        sell_orders = order_depth.sell_orders
+        # BookSides know their best level; plain exchange dicts need a max/min over a few levels
+        self.best_bid = buy_orders.best() if isinstance(buy_orders, BookSide) else max(buy_orders, default=None)
+        self.best_ask = sell_orders.best() if isinstance(sell_orders, BookSide) else min(sell_orders, default=None)
+        self.bid_volume = buy_orders[self.best_bid] if self.best_bid is not None else 0
+        self.ask_volume = -sell_orders[self.best_ask] if self.best_ask is not None else 0
+        self.bid_levels = len(buy_orders)
+        self.ask_levels = len(sell_orders)
+        if self.best_bid is not None and self.best_ask is not None:
+            self.mid_price = (self.best_bid + self.best_ask) / 2
+        else:
+            self.mid_price = NAN
+        if trades:
+            self.trade_price = trades[-1].price
+
+
+class RollingMoments:
+    """Rolling sample mean/std over a fixed window, shifted by the first value to limit cancellation."""
+
+    def __init__(self, window: int) -> None:
+        self.window = window
+        self.values: deque[float] = deque()
+        self.shift = None
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def append(self, value: float) -> None:
+        if self.shift is None:
+            self.shift = value
+        value -= self.shift
+        self.values.append(value)
+        self.total += value
+        self.total_sq += value * value
+        if len(self.values) > self.window:
+            evicted = self.values.popleft()
+            self.total -= evicted
+            self.total_sq -= evicted * evicted
+
+    def full(self) -> bool:
+        return len(self.values) == self.window
+
+    def mean(self) -> float:
+        return self.total / len(self.values) + self.shift
+
+    def std(self) -> float:
+        # ddof=1, as pandas rolling().std()
+        n = len(self.values)
+        if n < 2:
+            return NAN
+        variance = (self.total_sq - self.total * self.total / n) / (n - 1)
+        return math.sqrt(max(variance, 0.0))
+
+
+class RollingExtrema:
+    """Rolling max and min over a fixed window with monotonic deques (amortised O(1))."""
+
+    def __init__(self, window: int) -> None:
+        self.window = window
+        self.count = 0
+        self.maxima: deque[tuple[int, float]] = deque()
+        self.minima: deque[tuple[int, float]] = deque()
+
+    def append(self, value: float) -> None:
+        while self.maxima and self.maxima[-1][1] <= value:
+            self.maxima.pop()
+        while self.minima and self.minima[-1][1] >= value:
+            self.minima.pop()
+        self.maxima.append((self.count, value))
+        self.minima.append((self.count, value))
+        self.count += 1
+        while self.maxima[0][0] <= self.count - 1 - self.window:
+            self.maxima.popleft()
+        while self.minima[0][0] <= self.count - 1 - self.window:
+            self.minima.popleft()
+
+    def max(self) -> float:
+        return self.maxima[0][1]
+
+    def min(self) -> float:
+        return self.minima[0][1]
+
+
+class Feature(ABC):
+    name = ""
+
+    @abstractmethod
+    def update(self, book: Book) -> float:
+        """The feature's value after this tick's book."""
+
+
+def price_of(book: Book, source: str) -> float:
+    return book.mid_price if source == "mid" else book.trade_price
+
+
+@feature("mid_price")
+class MidPrice(Feature):
+
+    def update(self, book: Book) -> float:
+        return book.mid_price
+
+
+@feature("spread")
+class Spread(Feature):
+    # (best ask - best bid) / mid price, as t.py spread_ and the notebook's bt_spread
+
+    def update(self, book: Book) -> float:
+        if book.mid_price != book.mid_price:
+            return NAN
+        return (book.best_ask - book.best_bid) / book.mid_price
+
+
+@feature("orderbook_imbalance")
+class OrderbookImbalance(Feature):
+    # (ask levels - bid levels) / total levels, as t.py orderbook_imbalance
+
+    def update(self, book: Book) -> float:
+        total = book.ask_levels + book.bid_levels
+        return (book.ask_levels - book.bid_levels) / total if total else 0.0
+
+
+@feature("orderbook_imbalance_ratio")
+class OrderbookImbalanceRatio(Feature):
+
+    def update(self, book: Book) -> float:
+        return book.ask_levels / book.bid_levels if book.bid_levels else math.inf
+
+
+@feature("bid_flow")
+class BidFlow(Feature):
+    # Change in best-bid volume since the previous tick
+
+    def __init__(self) -> None:
+        self.previous = None
+
+    def update(self, book: Book) -> float:
+        flow = book.bid_volume - self.previous if self.previous is not None else NAN
+        self.previous = book.bid_volume
+        return flow
+
+
+@feature("ask_flow")
+class AskFlow(Feature):
+
+    def __init__(self) -> None:
+        self.previous = None
+
+    def update(self, book: Book) -> float:
+        flow = book.ask_volume - self.previous if self.previous is not None else NAN
+        self.previous = book.ask_volume
+        return flow
+
+
+@feature("order_flow_imbalance")
+class OrderFlowImbalance(Feature):
+
+    def __init__(self) -> None:
+        self.bid_flow = BidFlow()
+        self.ask_flow = AskFlow()
+
+    def update(self, book: Book) -> float:
+        return self.bid_flow.update(book) - self.ask_flow.update(book)
+
+
+@feature("rip_indicator")
+class RipIndicator(Feature):
+    # 1 if the price rose by at least `threshold` over the last `periods` ticks
+
+    def __init__(self, periods: int = 5, threshold: float = 0.05, source: str = "mid") -> None:
+        self.periods = periods
+        self.threshold = threshold
+        self.source = source
+        self.prices: deque[float] = deque(maxlen=periods + 1)
+
+    def update(self, book: Book) -> float:
+        self.prices.append(price_of(book, self.source))
+        if len(self.prices) <= self.periods:
+            return 0.0
+        return 1.0 if self.prices[-1] / self.prices[0] - 1 >= self.threshold else 0.0
+
+
+@feature("x_vol")
+class XVol(Feature):
+    # Sample standard deviation of the price over the last `window` ticks
+
+    def __init__(self, window: int = 10, source: str = "mid") -> None:
+        self.source = source
+        self.moments = RollingMoments(window)
+
+    def update(self, book: Book) -> float:
+        price = price_of(book, self.source)
+        if price != price:
+            return NAN
+        self.moments.append(price)
+        return self.moments.std() if self.moments.full() else NAN
+
+
+@feature("vol_ratio")
+class VolRatio(Feature):
+    # (max - min) / mean of the last `window` x_vol values
+
+    def __init__(self, window: int = 10, vol_window: int = 10, source: str = "mid") -> None:
+        self.x_vol = XVol(vol_window, source)
+        self.extrema = RollingExtrema(window)
+        self.moments = RollingMoments(window)
+
+    def update(self, book: Book) -> float:
+        vol = self.x_vol.update(book)
+        if vol != vol:
+            return NAN
+        self.extrema.append(vol)
+        self.moments.append(vol)
+        if not self.moments.full():
+            return NAN
+        high, low = self.extrema.max(), self.extrema.min()
+        # A flat window's mean is its value; the running sums can leave a residue there instead of 0
+        mean = self.moments.mean() if high != low else high
+        return (high - low) / mean if mean else NAN
+
+
+class FeatureEngine:
+    """Computes a fixed list of registered features for several products, one update per tick."""
+
+    def __init__(self, features: list[str | tuple[str, dict[str, Any]]], products: list[Symbol]) -> None:
+        self.specs = [(spec, {}) if isinstance(spec, str) else spec for spec in features]
+        self.names = [name for name, _ in self.specs]
+        self.products = products
+        self.books = {product: Book() for product in products}
+        self.features = {product: [FEATURES[name](**params) for name, params in self.specs] for product in products}
+
+    def update(self, state: TradingState) -> dict[Symbol, list[float]]:
+        values = {}
+        for product in self.products:
+            order_depth = state.order_depths.get(product)
+            if order_depth is None:
+                continue
+            book = self.books[product]
+            book.update(order_depth, state.market_trades.get(product, []))
+            values[product] = [feature.update(book) for feature in self.features[product]]
+        return values
+
+    def vector(self, state: TradingState) -> list[float]:
+        """All products' features flattened product by product, NaN for products missing this tick."""
+        values = self.update(state)
+        missing = [NAN] * len(self.names)
+        return [value for product in self.products for value in values.get(product, missing)]
+
+
+if __name__ == "__main__":
+    from backtester import day_states, load_day
+
+    day = int(sys.argv[1]) if len(sys.argv) > 1 else -2
+    data = load_day(1, day)
+    states = day_states(data)
+
+    engine = FeatureEngine(list(FEATURES), data.products)
+    start = time.perf_counter()
+    for state in states:
+        engine.vector(state)
+    elapsed = time.perf_counter() - start
+    print(f"{len(FEATURES)} features x {len(data.products)} products: {elapsed / len(states) * 1e6:.1f}us/tick")
@@ -0,0 +1,108 @@
+"""Replays a recorded order stream against a day's books and trades tape under a chosen fill model.
+
+run_backtest(queue=True) is the closed-loop version of the queue model. Here a trader's orders
+are recorded once and simulate() re-matches them without calling the trader, at tens of
+thousands of ticks per second. Under the recording's own model this reproduces the backtest
+exactly; under another model the positions drift, so the limit check cancels different orders
+and only the closed-loop numbers are a fair comparison. The fill models are:
+
+    none    book fills only (orders that don't cross never fill)
+    trades  passive orders also fill against any market trade at or through their price
+    queue   as trades, but a trade at exactly the order's price first goes to the volume the
+            book already showed at that level (see backtester.match_orders)
+
+    python fillsim.py [trader.py] [days...]
+"""
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+from typing import Any
+
+from backtester import (POSITION_LIMITS, BacktestResult, DayData, book_fills, load_day, load_trader, match_orders,
+                        run_backtest, within_limits)
+from datacache import DATA_DIR
+from datamodel import Order, Symbol, Trade
+
+FILL_MODELS = ["none", "trades", "queue"]
+
+
+def record_orders(trader: Any, data: DayData, queue: bool = True) -> list[dict[Symbol, list[Order]]]:
+    """The orders trader sends on every tick of a closed-loop backtest."""
+    sent = []
+    run = trader.run
+
+    def recording_run(state):
+        orders, conversions, trader_data = run(state)
+        sent.append({symbol: list(symbol_orders) for symbol, symbol_orders in orders.items()})
+        return orders, conversions, trader_data
+
+    trader.run = recording_run
+    with open(os.devnull, "w") as sink, redirect_stdout(sink):
+        run_backtest(trader, data, queue=queue, print_output=True)
+    return sent
+
+
+def simulate(data: DayData, orders: list[dict[Symbol, list[Order]]], model: str = "queue",
+             position_limits: dict[Symbol, int] = POSITION_LIMITS) -> BacktestResult:
+    """Match orders[i] on tick i of data under the fill model, with the exchange's position limit check."""
+    result = BacktestResult(data.day, data.products)
+    position: dict[Symbol, int] = {}
+    cash = {product: 0.0 for product in data.products}
+    match_trades = model != "none"
+    queue = model == "queue"
+    no_trades: list[Trade] = []
+
+    for timestamp, tick_orders in zip(data.timestamps, orders):
+        books = data.books[timestamp]
+        tick_trades: dict[Symbol, list[Trade]] = {}
+        if match_trades:
+            for trade in data.trades.get(timestamp, no_trades):
+                tick_trades.setdefault(trade.symbol, []).append(trade)
+
+        for symbol, symbol_orders in tick_orders.items():
+            if not symbol_orders:
+                continue
+            if symbol not in position_limits:
+                raise ValueError(f"orders for {symbol}, which has no position limit")
+            if symbol not in books:
+                continue
+            if not within_limits(symbol_orders, position.get(symbol, 0), position_limits[symbol]):
+                continue
+            buy_orders, sell_orders = books[symbol]
+            # DayData sides are already best level first; copies keep them intact for the next run
+            fills = match_orders(symbol, symbol_orders, dict(buy_orders), dict(sell_orders),
+                                 tick_trades.get(symbol, no_trades), timestamp, queue)
+            if fills:
+                book_fills(symbol, fills, position, cash)
+                result.fills.extend(fills)
+
+        mid_prices = data.mid_prices[timestamp]
+        for product in data.products:
+            result.pnl[product] = cash[product] + position.get(product, 0) * mid_prices[product]
+        result.timestamps.append(timestamp)
+        result.pnl_path.append(sum(result.pnl.values()))
+        result.positions.append(dict(position))
+
+    return result
+
+
+if __name__ == "__main__":
+    trader_file = sys.argv[1] if len(sys.argv) > 1 else os.path.join(DATA_DIR, "trader.py")
+    days = [int(day) for day in sys.argv[2:]] or [-2, -1, 0]
+
+    trader_cls = load_trader(trader_file)
+    for day in days:
+        data = load_day(1, day)
+        print(f"Day {day}, closed-loop backtests of {os.path.basename(trader_file)}:")
+        for model in FILL_MODELS:
+            result = run_backtest(trader_cls(), data, match_trades=model != "none", queue=model == "queue")
+            print(f"  {model:<7} PnL {result.total_pnl:>10,.1f}  fills {len(result.fills):>5}")
+
+        # Re-matching the recorded orders must reproduce the closed-loop run exactly
+        orders = record_orders(trader_cls(), data)
+        start = time.perf_counter()
+        replayed = simulate(data, orders, "queue")
+        elapsed = time.perf_counter() - start
+        print(f"  queue model on the recorded orders: PnL {replayed.total_pnl:,.1f}, "
+              f"{len(data.timestamps) / elapsed:,.0f} ticks/s")
@@ -0,0 +1,454 @@
+import copy
+import json
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+from array import array
+from typing import Any, Iterator, TextIO
+
+import numpy as np
+
+from datacache import MISSING, Table
+from datamodel import ConversionObservation, Observation, Order, OrderDepth, Symbol, Trade, TradingState
+
+MAX_LEVELS = 3
+SECTIONS = {"Sandbox logs:": "sandbox", "Activities log:": "activities", "Trade History:": "trades"}
+
+
+class SandboxLog:
+    """Columnar view of one backtest log.
+
+    Per-tick arrays are indexed by tick number (position in timestamps). Book levels are
+    (ticks, MAX_LEVELS) arrays per product, best level first, MISSING where a level is empty.
+    Our orders are flat arrays with order_tick pointing back into timestamps.
+    """
+
+    def __init__(self) -> None:
+        self.timestamps = np.empty(0, dtype=np.int64)
+        self.products: list[str] = []
+        self.bid_prices: dict[str, np.ndarray] = {}
+        self.bid_volumes: dict[str, np.ndarray] = {}
+        self.ask_prices: dict[str, np.ndarray] = {}
+        self.ask_volumes: dict[str, np.ndarray] = {}
+        self.positions: dict[str, np.ndarray] = {}
+        self.order_tick = np.empty(0, dtype=np.int32)
+        self.order_symbol = np.empty(0, dtype=np.int16)
+        self.order_price = np.empty(0, dtype=np.int64)
+        self.order_quantity = np.empty(0, dtype=np.int64)
+        self.conversions = np.empty(0, dtype=np.int64)
+        self.trader_data: list[str] = []
+        self.logs: list[str] = []
+        self.sandbox_logs: list[str] = []
+        self.activities: Table | None = None
+        self.trades: Table | None = None
+
+    def orders_at(self, tick: int) -> list[tuple[str, int, int]]:
+        start, end = np.searchsorted(self.order_tick, [tick, tick + 1])
+        return [(self.products[self.order_symbol[i]], int(self.order_price[i]), int(self.order_quantity[i]))
+                for i in range(start, end)]
+
+
+def iter_sections(f: TextIO) -> Iterator[tuple[str, str]]:
+    section = None
+    for line in f:
+        stripped = line.strip()
+        if stripped in SECTIONS:
+            section = SECTIONS[stripped]
+            continue
+        if section is not None:
+            yield section, line
+
+
+def iter_json_objects(lines: Iterator[str]) -> Iterator[dict[str, Any]]:
+    # Objects are pretty-printed one key per line, so "{" and "}"/"}," lines delimit them
+    buffer = []
+    for line in lines:
+        stripped = line.strip()
+        if stripped == "{":
+            buffer = [stripped]
+        elif stripped in ("}", "},") and buffer:
+            buffer.append("}")
+            yield json.loads("".join(buffer))
+            buffer = []
+        elif buffer:
+            buffer.append(stripped)
+
+
+class BookDecoder:
+    """Rebuilds full order depths from the order_depths field of successive lambdaLog entries.
+
+    Plain Logger output (a symbol -> [buy_orders, sell_orders] dict) passes through. Delta-mode
+    output (Logger(delta_books=True)) is ["K", books] for keyframes and ["D", changes] otherwise;
+    see Logger.compress_book_deltas. Deltas seen before the first keyframe are skipped.
+    Books are returned with int prices, each side in logged order.
+    """
+
+    def __init__(self) -> None:
+        self.books: dict[str, tuple[dict[int, int], dict[int, int]]] = {}
+
+    def decode(self, order_depths: dict[str, Any] | list[Any]) -> dict[str, tuple[dict[int, int], dict[int, int]]]:
+        if isinstance(order_depths, dict):
+            kind, books = "K", order_depths
+        else:
+            kind, books = order_depths
+
+        if kind == "K":
+            self.books = {
+                symbol: ({int(price): volume for price, volume in buy_orders.items()},
+                         {int(price): volume for price, volume in sell_orders.items()})
+                for symbol, (buy_orders, sell_orders) in books.items()
+            }
+        else:
+            for symbol, (buy_levels, sell_levels) in books.items():
+                if symbol not in self.books:
+                    continue
+                last_buy_orders, last_sell_orders = self.books[symbol]
+                self.books[symbol] = (self.apply_levels(last_buy_orders, buy_levels, 1),
+                                      self.apply_levels(last_sell_orders, sell_levels, -1))
+
+        return {symbol: (dict(buy_orders), dict(sell_orders)) for symbol, (buy_orders, sell_orders) in self.books.items()}
+
+    def apply_levels(self, last: dict[int, int], levels: list[int], sign: int) -> dict[int, int]:
+        reference = next(iter(last), 0)
+        return {reference + levels[i]: sign * levels[i + 1] for i in range(0, len(levels), 2)}
+
+
+def iter_lambda_logs(path: str) -> Iterator[list[Any]]:
+    """Yield the decoded [state, orders, conversions, trader_data, logs] list of every sandbox log entry."""
+    with open(path) as f:
+        lines = (line for section, line in iter_sections(f) if section == "sandbox")
+        for entry in iter_json_objects(lines):
+            try:
+                lambda_log = json.loads(entry.get("lambdaLog", ""))
+            except ValueError:
+                continue
+            if lambda_log:
+                yield lambda_log
+
+
+def iter_books(path: str) -> Iterator[tuple[int, dict[str, tuple[dict[int, int], dict[int, int]]]]]:
+    """Yield (timestamp, full order depths) for every sandbox log entry of a backtest log."""
+    decoder = BookDecoder()
+    for lambda_log in iter_lambda_logs(path):
+        state = lambda_log[0]
+        yield state[0], decoder.decode(state[3])
+
+
+class LoggedTick:
+    """One lambdaLog entry turned back into what the exchange sent and what the trader answered.
+
+    traderData in the state and trader_data are as logged; Logger.flush cuts them with a trailing
+    "..." when a tick's log would exceed the length limit, so a cut string is not the original.
+    """
+    __slots__ = ("state", "orders", "conversions", "trader_data", "logs")
+
+    def __init__(self, state: TradingState, orders: dict[Symbol, list[Order]], conversions: int,
+                 trader_data: str, logs: str) -> None:
+        self.state = state
+        self.orders = orders
+        self.conversions = conversions
+        self.trader_data = trader_data
+        self.logs = logs
+
+
+def decode_trades(compressed: list[list[Any]]) -> dict[Symbol, list[Trade]]:
+    trades: dict[Symbol, list[Trade]] = {}
+    for symbol, price, quantity, buyer, seller, timestamp in compressed:
+        trades.setdefault(symbol, []).append(Trade(symbol, price, quantity, buyer, seller, timestamp))
+    return trades
+
+
+def decode_state(compressed: list[Any], decoder: BookDecoder) -> TradingState:
+    """Reverse Logger.compress_state. The decoder carries books between calls for delta-mode logs."""
+    timestamp, trader_data, listings, order_depths, own_trades, market_trades, position, observations = compressed
+
+    depths = {}
+    for symbol, (buy_orders, sell_orders) in decoder.decode(order_depths).items():
+        depth = OrderDepth()
+        depth.buy_orders = buy_orders
+        depth.sell_orders = sell_orders
+        depths[symbol] = depth
+
+    plain_observations, conversion_observations = observations
+    return TradingState(
+        trader_data,
+        timestamp,
+        # Listings are plain dicts on the exchange, which Logger.compress_listings relies on
+        {symbol: {"symbol": symbol, "product": product, "denomination": denomination}
+         for symbol, product, denomination in listings},
+        depths,
+        decode_trades(own_trades),
+        decode_trades(market_trades),
+        position,
+        Observation(plain_observations,
+                    {product: ConversionObservation(*values) for product, values in conversion_observations.items()}),
+    )
+
+
+def iter_ticks(path: str) -> Iterator[LoggedTick]:
+    """Yield every sandbox log entry of a backtest log as a LoggedTick, in order."""
+    decoder = BookDecoder()
+    for lambda_log in iter_lambda_logs(path):
+        state, orders, conversions, trader_data, logs = lambda_log
+        decoded_orders: dict[Symbol, list[Order]] = {}
+        for symbol, price, quantity in orders:
+            decoded_orders.setdefault(symbol, []).append(Order(symbol, price, quantity))
+        yield LoggedTick(decode_state(state, decoder), decoded_orders, conversions, trader_data, logs)
+
+
+def load_states(path: str) -> list[TradingState]:
+    return [tick.state for tick in iter_ticks(path)]
+
+
+def replay(trader: Any, ticks: list[LoggedTick], logged_trader_data: bool = True) -> list[int]:
+    """Run trader on every logged state and return the ticks whose orders or conversions differ from the log.
+
+    With logged_trader_data the trader gets the traderData the exchange sent; otherwise its own
+    trader_data from the previous tick is threaded through, as a fresh session would.
+    """
+    diverged = []
+    trader_data = ""
+    with open(os.devnull, "w") as sink, redirect_stdout(sink):
+        for i, tick in enumerate(ticks):
+            state = tick.state
+            if not logged_trader_data:
+                state = copy.copy(state)
+                state.traderData = trader_data
+            orders, conversions, trader_data = trader.run(state)
+            sent = {symbol: [(order.price, order.quantity) for order in symbol_orders]
+                    for symbol, symbol_orders in orders.items() if symbol_orders}
+            logged = {symbol: [(order.price, order.quantity) for order in symbol_orders]
+                      for symbol, symbol_orders in tick.orders.items()}
+            if sent != logged or (conversions or 0) != (tick.conversions or 0):
+                diverged.append(i)
+    return diverged
+
+
+class ColumnBuilder:
+    """Accumulates ;-separated rows into typed arrays without keeping the text around."""
+
+    def __init__(self, header: str) -> None:
+        self.names = [name.strip() for name in header.strip().split(";")]
+        self.values: list[array | None] = [None] * len(self.names)
+        self.categories: list[dict[str, int] | None] = [None] * len(self.names)
+        self.pending = [0] * len(self.names)
+
+    def add(self, values: list[Any]) -> None:
+        for i, value in enumerate(values[:len(self.names)]):
+            column = self.values[i]
+            if column is None:
+                if value == "":
+                    # Type is decided by the first non-empty cell; leading empties are back-filled
+                    self.pending[i] += 1
+                    continue
+                column = self.values[i] = self.new_column(i, value)
+                for _ in range(self.pending[i]):
+                    self.append(i, column, "")
+
+            self.append(i, column, value)
+
+    def append(self, i: int, column: array, value: Any) -> None:
+        if self.categories[i] is not None:
+            column.append(self.categories[i].setdefault(str(value), len(self.categories[i])))
+        elif column.typecode == "d":
+            column.append(float("nan") if value == "" else float(value))
+        else:
+            column.append(MISSING if value == "" else int(float(value)))
+
+    def new_column(self, i: int, value: Any) -> array:
+        if isinstance(value, int) and not isinstance(value, bool):
+            return array("q")
+        if isinstance(value, float):
+            return array("d")
+        try:
+            int(value)
+            return array("q")
+        except ValueError:
+            pass
+        try:
+            float(value)
+            return array("d")
+        except ValueError:
+            pass
+        self.categories[i] = {}
+        return array("h")
+
+    def table(self) -> Table:
+        columns = {}
+        categories = {}
+        for name, values, codes, pending in zip(self.names, self.values, self.categories, self.pending):
+            if values is None:
+                columns[name] = np.zeros(pending, dtype=np.int16)
+                categories[name] = [""]
+                continue
+            columns[name] = np.frombuffer(values, dtype={"q": np.int64, "d": np.float64, "h": np.int16}[values.typecode])
+            if codes is not None:
+                categories[name] = list(codes)
+        return Table(columns, categories)
+
+
+class LogBuilder:
+
+    def __init__(self) -> None:
+        self.timestamps = array("q")
+        self.product_index: dict[str, int] = {}
+        # Long-format book levels: tick, product, level, price, volume per side
+        self.levels = {side: tuple(array("q") for _ in range(5)) for side in ("bid", "ask")}
+        self.position_rows = tuple(array("q") for _ in range(3))
+        self.orders = tuple(array("q") for _ in range(4))
+        self.conversions = array("q")
+        self.trader_data: list[str] = []
+        self.logs: list[str] = []
+        self.sandbox_logs: list[str] = []
+        self.books = BookDecoder()
+
+    def product(self, symbol: str) -> int:
+        return self.product_index.setdefault(symbol, len(self.product_index))
+
+    def add(self, entry: dict[str, Any]) -> None:
+        tick = len(self.timestamps)
+        self.timestamps.append(int(entry.get("timestamp", MISSING)))
+        self.sandbox_logs.append(entry.get("sandboxLog", ""))
+
+        try:
+            state, orders, conversions, trader_data, logs = json.loads(entry.get("lambdaLog", ""))
+        except ValueError:
+            self.conversions.append(0)
+            self.trader_data.append("")
+            self.logs.append(entry.get("lambdaLog", ""))
+            return
+
+        order_depths = self.books.decode(state[3])
+        for symbol, (buy_orders, sell_orders) in order_depths.items():
+            product = self.product(symbol)
+            for side, orders_by_price, reverse in (("bid", buy_orders, True), ("ask", sell_orders, False)):
+                columns = self.levels[side]
+                prices = sorted(orders_by_price, reverse=reverse)
+                for level, price in enumerate(prices[:MAX_LEVELS]):
+                    columns[0].append(tick)
+                    columns[1].append(product)
+                    columns[2].append(level)
+                    columns[3].append(price)
+                    columns[4].append(abs(orders_by_price[price]))
+
+        for symbol, position in state[6].items():
+            self.position_rows[0].append(tick)
+            self.position_rows[1].append(self.product(symbol))
+            self.position_rows[2].append(position)
+
+        for symbol, price, quantity in orders:
+            self.orders[0].append(tick)
+            self.orders[1].append(self.product(symbol))
+            self.orders[2].append(int(price))
+            self.orders[3].append(int(quantity))
+
+        self.conversions.append(int(conversions or 0))
+        self.trader_data.append(trader_data)
+        self.logs.append(logs)
+
+    def finish(self, log: SandboxLog) -> None:
+        ticks = len(self.timestamps)
+        log.timestamps = np.frombuffer(self.timestamps, dtype=np.int64)
+        log.products = list(self.product_index)
+
+        for side, prices_out, volumes_out in (("bid", log.bid_prices, log.bid_volumes), ("ask", log.ask_prices, log.ask_volumes)):
+            tick, product, level, price, volume = (np.frombuffer(column, dtype=np.int64) for column in self.levels[side])
+            for symbol, index in self.product_index.items():
+                mask = product == index
+                prices = np.full((ticks, MAX_LEVELS), MISSING, dtype=np.int64)
+                volumes = np.full((ticks, MAX_LEVELS), MISSING, dtype=np.int64)
+                prices[tick[mask], level[mask]] = price[mask]
+                volumes[tick[mask], level[mask]] = volume[mask]
+                prices_out[symbol] = prices
+                volumes_out[symbol] = volumes
+
+        tick, product, position = (np.frombuffer(column, dtype=np.int64) for column in self.position_rows)
+        for symbol, index in self.product_index.items():
+            positions = np.zeros(ticks, dtype=np.int64)
+            mask = product == index
+            positions[tick[mask]] = position[mask]
+            log.positions[symbol] = positions
+
+        log.order_tick = np.frombuffer(self.orders[0], dtype=np.int64).astype(np.int32)
+        log.order_symbol = np.frombuffer(self.orders[1], dtype=np.int64).astype(np.int16)
+        log.order_price = np.frombuffer(self.orders[2], dtype=np.int64)
+        log.order_quantity = np.frombuffer(self.orders[3], dtype=np.int64)
+        log.conversions = np.frombuffer(self.conversions, dtype=np.int64)
+        log.trader_data = self.trader_data
+        log.logs = self.logs
+        log.sandbox_logs = self.sandbox_logs
+
+
+def parse_log(path: str) -> SandboxLog:
+    """Parse a backtests/*.log file in a single streaming pass."""
+    log = SandboxLog()
+    builder = LogBuilder()
+    activities = None
+    trades = None
+    trade_lines: list[str] = []
+
+    def sandbox_lines() -> Iterator[str]:
+        nonlocal activities, trades
+        for section, line in sections:
+            if section == "sandbox":
+                yield line
+            elif section == "activities":
+                if not line.strip():
+                    continue
+                if activities is None:
+                    activities = ColumnBuilder(line)
+                else:
+                    activities.add(line.rstrip("\n").split(";"))
+            else:
+                trade_lines.append(line)
+                # Trade objects are seven lines each; hand them over as soon as one is complete
+                if line.strip() in ("}", "},"):
+                    for trade in iter_json_objects(iter(trade_lines)):
+                        if trades is None:
+                            trades = ColumnBuilder(";".join(trade))
+                        trades.add(list(trade.values()))
+                    trade_lines.clear()
+
+    with open(path) as f:
+        sections = iter_sections(f)
+        for entry in iter_json_objects(sandbox_lines()):
+            builder.add(entry)
+
+    builder.finish(log)
+    log.activities = activities.table() if activities is not None else None
+    log.trades = trades.table() if trades is not None else None
+    return log
+
+
+if __name__ == "__main__":
+    # python logparser.py backtests/*.log [--replay trader.py]
+    args = sys.argv[1:]
+    trader_file = None
+    if "--replay" in args:
+        index = args.index("--replay")
+        trader_file = args[index + 1]
+        del args[index:index + 2]
+
+    for path in args:
+        start = time.perf_counter()
+        log = parse_log(path)
+        elapsed = time.perf_counter() - start
+        print(f"{path}: {len(log.timestamps)} ticks, {len(log.order_tick)} orders, "
+              f"{len(log.activities or [])} activity rows, {len(log.trades or [])} trades in {elapsed:.2f}s")
+
+        if trader_file:
+            from backtester import load_trader
+
+            start = time.perf_counter()
+            ticks = list(iter_ticks(path))
+            decoded = time.perf_counter() - start
+            start = time.perf_counter()
+            diverged = replay(load_trader(trader_file)(), ticks)
+            replayed = time.perf_counter() - start
+            print(f"  decoded {len(ticks)} states in {decoded:.2f}s ({len(ticks) / decoded:,.0f}/s), "
+                  f"replayed through {trader_file} in {replayed:.2f}s ({len(ticks) / replayed:,.0f} ticks/s)")
+            if diverged:
+                print(f"  {len(diverged)} ticks differ from the log, first at timestamp {ticks[diverged[0]].state.timestamp}")
+            else:
+                print("  orders and conversions match the log on every tick")
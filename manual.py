@@ -0,0 +1,133 @@
+"""Best pair of bids for the day-1 manual round, from day1manual.ipynb without the nested loops.
+
+Each turtle has a reserve price drawn from [900, 1000] with density rising linearly, so
+reserve = 900 + 100 * sqrt(u) for uniform u. A turtle sells to the low bid if its reserve is
+at or below it, otherwise to the high bid if its reserve is below that, and every unit bought
+is resold at 1000. For a bid b, the profit only depends on how many reserves fall below b, so
+the samples are drawn in batches, sorted once, and counted at every bid with searchsorted;
+each (low, high) pair is then scored from the cumulative counts in one broadcast. The exact
+mode replaces the counts with the reserve distribution's CDF.
+
+    python manual.py [--samples 1000000] [--exact] [--workers 4] [--turtles 1000]
+"""
+import argparse
+import math
+import os
+import time
+
+import numpy as np
+
+from backtester import process_pool
+
+RESERVE_LOW = 900
+RESERVE_HIGH = 1000
+SELL_PRICE = 1000
+
+
+def inverse_cdf(u: np.ndarray) -> np.ndarray:
+    return RESERVE_LOW + (RESERVE_HIGH - RESERVE_LOW) * np.sqrt(u)
+
+
+def cdf(x: np.ndarray) -> np.ndarray:
+    return np.clip((np.asarray(x, dtype=np.float64) - RESERVE_LOW) / (RESERVE_HIGH - RESERVE_LOW), 0, 1) ** 2
+
+
+def sample_counts(task: tuple[np.random.SeedSequence, int, np.ndarray, int]) -> tuple[np.ndarray, np.ndarray]:
+    """Reserves at or below each bid and strictly below it, over samples draws made batch at a time."""
+    seed, samples, bids, batch = task
+    rng = np.random.default_rng(seed)
+    at_or_below = np.zeros(len(bids), dtype=np.int64)
+    below = np.zeros(len(bids), dtype=np.int64)
+    for start in range(0, samples, batch):
+        reserves = np.sort(inverse_cdf(rng.random(min(batch, samples - start))))
+        at_or_below += np.searchsorted(reserves, bids, side="right")
+        below += np.searchsorted(reserves, bids, side="left")
+    return at_or_below, below
+
+
+def simulated_counts(bids: np.ndarray, samples: int, workers: int | None = None, seed: int | None = None,
+                     batch: int = 1 << 20) -> tuple[np.ndarray, np.ndarray]:
+    """sample_counts over samples draws split across worker processes, each with its own spawned seed."""
+    workers = max(1, min(workers or os.cpu_count() or 1, samples))
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    tasks = [(seeds[i], samples // workers + (i < samples % workers), bids, batch) for i in range(workers)]
+    if workers == 1:
+        results = list(map(sample_counts, tasks))
+    else:
+        with process_pool(workers) as executor:
+            results = list(executor.map(sample_counts, tasks))
+    return sum(result[0] for result in results), sum(result[1] for result in results)
+
+
+def profit_grid(bids: np.ndarray, at_or_below: np.ndarray, below: np.ndarray, samples: float) -> np.ndarray:
+    """Mean profit per turtle of bidding (bids[i], bids[j]); pairs with the low bid above the high one are 0.
+
+    Matches the notebook's rule exactly, ties included: a reserve equal to the high bid goes
+    to the low bid, as does any reserve at or below the low bid.
+    """
+    low = bids[:, None].astype(np.float64)
+    high = bids[None, :].astype(np.float64)
+    to_low = at_or_below[:, None] + np.where(high > low, (at_or_below - below)[None, :], 0)
+    to_high = np.maximum(below[None, :] - at_or_below[:, None], 0)
+    grid = (SELL_PRICE - low) * to_low + (SELL_PRICE - high) * to_high
+    return np.where(high >= low, grid / samples, 0.0)
+
+
+def optimize(bids: np.ndarray | None = None, samples: int = 1_000_000, exact: bool = False,
+             workers: int | None = None, seed: int | None = None) -> dict:
+    """Profit per turtle of every bid pair and the best pair, simulated or from the exact CDF."""
+    bids = np.arange(RESERVE_LOW, RESERVE_HIGH) if bids is None else np.asarray(bids)
+    if exact:
+        # Continuous reserves never tie with a bid, so both counts are the CDF
+        counts = cdf(bids)
+        grid = profit_grid(bids, counts, counts, 1.0)
+    else:
+        grid = profit_grid(bids, *simulated_counts(bids, samples, workers, seed), samples)
+    i, j = np.unravel_index(np.argmax(grid), grid.shape)
+    return {"bids": bids, "grid": grid, "low": int(bids[i]), "high": int(bids[j]), "profit": float(grid[i, j])}
+
+
+def loop_grid(reserves: np.ndarray, bids: np.ndarray) -> np.ndarray:
+    """The notebook's loop over one set of reserves, for checking profit_grid."""
+    grid = np.zeros((len(bids), len(bids)))
+    for j, low in enumerate(bids):
+        for k in range(j, len(bids)):
+            high = bids[k]
+            for reserve in reserves:
+                if reserve > high:
+                    continue
+                if low < reserve < high:
+                    grid[j][k] += SELL_PRICE - high
+                else:
+                    grid[j][k] += SELL_PRICE - low
+    return grid / len(reserves)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Best pair of bids for the manual trading round")
+    parser.add_argument("--samples", type=int, default=1_000_000, help="simulated turtles (the notebook drew 1000 x 1000)")
+    parser.add_argument("--exact", action="store_true", help="use the reserve CDF instead of sampling")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--turtles", type=int, default=1000, help="turtles per round, to scale the profit")
+    args = parser.parse_args()
+
+    # Sorted counts must score exactly like the notebook's loop, ties on integer reserves included
+    rng = np.random.default_rng(0)
+    reserves = np.concatenate([inverse_cdf(rng.random(200)), [950.0, 975.0]])
+    small_bids = np.arange(940, 990, 5)
+    at_or_below = np.searchsorted(np.sort(reserves), small_bids, side="right")
+    below = np.searchsorted(np.sort(reserves), small_bids, side="left")
+    assert np.allclose(profit_grid(small_bids, at_or_below, below, len(reserves)), loop_grid(reserves, small_bids))
+
+    start = time.perf_counter()
+    result = optimize(samples=args.samples, exact=args.exact, workers=args.workers, seed=args.seed)
+    elapsed = time.perf_counter() - start
+    mode = "exact" if args.exact else f"{args.samples:,} samples"
+    print(f"{mode}: best bids {result['low']} / {result['high']}, {result['profit']:.4f} per turtle, "
+          f"{result['profit'] * args.turtles:,.1f} per {args.turtles} turtles ({elapsed * 1000:.0f}ms)")
+    if not args.exact:
+        exact = optimize(exact=True)
+        gap = exact["grid"][result["low"] - RESERVE_LOW, result["high"] - RESERVE_LOW]
+        print(f"exact: best bids {exact['low']} / {exact['high']}, {exact['profit']:.4f} per turtle; "
+              f"the simulated pair is worth {gap:.4f} ({math.fabs(exact['profit'] - gap):.4f} short)")
@@ -0,0 +1,159 @@
+"""One columnar view of a day's prices file, whichever of the two schemas it uses.
+
+Round-1 files are long: one row per (timestamp, product) with the book's levels. Round-2 files
+are wide: one row per timestamp with a price column per product and one column per
+observation (TRANSPORT_FEES, EXPORT_TARIFF, IMPORT_TARIFF, SUNLIGHT, HUMIDITY). load_columns()
+reads either into DayColumns: a sorted timestamp grid, a price array per product on that grid
+and the day's ObservationColumns. ObservationColumns keeps the columns as the cache's array
+views and builds a tick's Observation only when it is asked for, so a replay holds one tick's
+objects at a time instead of one per row.
+
+The files carry one price per product, so the South's conversion quote is modelled as that
+price -/+ SOUTH_HALF_SPREAD. ObservationColumns owns that model: the backtester's observations
+and conversion.py's vectorised evaluator both read bid and ask from it.
+
+    python observations.py [round] [days...]
+"""
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from datacache import MISSING, load_csv
+from datamodel import ConversionObservation, Observation, Product
+
+# Half the South's bid/ask spread around the single price the round-2 files carry
+SOUTH_HALF_SPREAD = 0.5
+# ConversionObservation arguments after bidPrice and askPrice, and the wide column each comes from
+CONVERSION_COLUMNS = {
+    "transportFees": "TRANSPORT_FEES",
+    "exportTariff": "EXPORT_TARIFF",
+    "importTariff": "IMPORT_TARIFF",
+    "sunlight": "SUNLIGHT",
+    "humidity": "HUMIDITY",
+}
+# Wide columns that are neither a product nor an observation
+WIDE_INDEX_COLUMNS = {"timestamp", "DAY"}
+
+
+class ObservationColumns:
+    """Per-tick observation columns of one day; self[i] is the Observation of the i-th timestamp."""
+
+    def __init__(self, timestamps: np.ndarray, conversion: dict[Product, list[np.ndarray]] | None = None,
+                 plain: dict[Product, np.ndarray] | None = None, south_half_spread: float = SOUTH_HALF_SPREAD) -> None:
+        self.timestamps = timestamps
+        # conversion[product] holds the product's price, then the CONVERSION_COLUMNS in order
+        self.conversion = conversion or {}
+        self.plain = plain or {}
+        self.south_half_spread = south_half_spread
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __getitem__(self, i: int) -> Observation:
+        plain = {product: float(column[i]) for product, column in self.plain.items()}
+        conversion = {}
+        for product, (price, *columns) in self.conversion.items():
+            mid = float(price[i])
+            conversion[product] = ConversionObservation(mid - self.south_half_spread, mid + self.south_half_spread,
+                                                        *[float(column[i]) for column in columns])
+        return Observation(plain, conversion)
+
+    def bid_prices(self, product: Product) -> np.ndarray:
+        return self.conversion[product][0] - self.south_half_spread
+
+    def ask_prices(self, product: Product) -> np.ndarray:
+        return self.conversion[product][0] + self.south_half_spread
+
+    def column(self, product: Product, name: str) -> np.ndarray:
+        """A CONVERSION_COLUMNS field (e.g. transportFees) of product's observations over the day."""
+        return self.conversion[product][1 + list(CONVERSION_COLUMNS).index(name)]
+
+    def at(self, timestamp: int) -> Observation:
+        i = int(np.searchsorted(self.timestamps, timestamp))
+        if i == len(self.timestamps) or self.timestamps[i] != timestamp:
+            return Observation({}, {})
+        return self[i]
+
+
+class DayColumns:
+    """A day's timestamp grid, price per product on it (NaN where a product has no row) and observations."""
+
+    def __init__(self, timestamps: np.ndarray, prices: dict[Product, np.ndarray], observations: ObservationColumns) -> None:
+        self.timestamps = timestamps
+        self.prices = prices
+        self.observations = observations
+
+    @property
+    def products(self) -> list[Product]:
+        return list(self.prices)
+
+
+def load_columns(path: str, south_half_spread: float = SOUTH_HALF_SPREAD) -> DayColumns:
+    table = load_csv(path)
+    if "product" in table.categories:
+        timestamps = np.unique(np.asarray(table["timestamp"]))
+        prices = {}
+        for product in table.categories["product"]:
+            rows = table.mask("product", product)
+            values = np.full(len(timestamps), np.nan)
+            values[np.searchsorted(timestamps, table["timestamp"][rows])] = table["mid_price"][rows]
+            prices[product] = values
+        return DayColumns(timestamps, prices, ObservationColumns(timestamps, south_half_spread=south_half_spread))
+
+    timestamps = np.asarray(table["timestamp"])
+    order = np.argsort(timestamps, kind="stable")
+    if not np.all(order[1:] > order[:-1]):
+        # Unsorted files lose the zero-copy views; the round-2 files are already in time order
+        table.columns = {name: column[order] for name, column in table.columns.items()}
+        timestamps = np.asarray(table["timestamp"])
+
+    def column(name: str) -> np.ndarray:
+        # Plain ndarray views of the memmap; indexing a memmap scalar by scalar is several times slower
+        values = np.asarray(table[name])
+        return np.where(values == MISSING, np.nan, values) if values.dtype.kind == "i" else values
+
+    observed = set(CONVERSION_COLUMNS.values())
+    products = [name for name in table.columns if name not in observed and name not in WIDE_INDEX_COLUMNS]
+    prices = {product: column(product) for product in products}
+    conversion = {}
+    if observed <= set(table.columns):
+        for product in products:
+            conversion[product] = [prices[product]] + [column(name) for name in CONVERSION_COLUMNS.values()]
+    return DayColumns(timestamps, prices, ObservationColumns(timestamps, conversion, south_half_spread=south_half_spread))
+
+
+if __name__ == "__main__":
+    from backtester import prices_path
+
+    round_num = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    days = [int(day) for day in sys.argv[2:]] or ([-1, 0, 1] if round_num == 2 else [-2, -1, 0])
+
+    for day in days:
+        path = prices_path(round_num, day)
+        table = load_csv(path)
+        columns = load_columns(path)
+        observations = columns.observations
+
+        # Every lazily built observation must carry the file's values for its row
+        for i in range(len(observations)):
+            observation = observations[i]
+            for product, conversion in observation.conversionObservations.items():
+                assert conversion.bidPrice == table[product][i] - observations.south_half_spread
+                assert conversion.askPrice == table[product][i] + observations.south_half_spread
+                for name, source in CONVERSION_COLUMNS.items():
+                    assert getattr(conversion, name) == table[source][i], (day, i, name)
+
+        start = time.perf_counter()
+        for i in range(len(observations)):
+            observation = observations[i]
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        for i in range(len(observations)):
+            observation = observations[i]
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"Round {round_num} day {day}: {len(columns.timestamps)} ticks, products {columns.products}, "
+              f"observations for {list(observations.conversion)}; {len(observations) / elapsed:,.0f} observations/s, "
+              f"peak {peak / 1024:.1f}KB while streaming")
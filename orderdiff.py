@@ -0,0 +1,127 @@
+"""Feed one stream of TradingStates to several Trader versions and report where their orders differ.
+
+The states are built once in the parent: round-1 days as the backtester would send them (with
+the positions the first trader held in its own backtest, so every version sees the same
+inventory), or the states recorded in a backtest log. Each trader then replays the whole stream
+in its own forked worker, threading its own traderData, and the parent compares the order lists.
+
+    python orderdiff.py trader.py submittedRound1.py t.py [--days -2 -1 0] [--log LOG] [--show 5]
+"""
+import argparse
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+from backtester import copy_state, day_states, load_day, load_trader, process_pool, run_backtest
+from datamodel import TradingState
+from logparser import load_states
+
+# (symbol, price, quantity) in the order the trader sent them, plus conversions
+TickOrders = tuple[tuple[tuple[str, int, int], ...], int]
+
+_streams: dict[str, list[TradingState]] = {}
+
+
+def init_worker(streams: dict[str, list[TradingState]]) -> None:
+    global _streams
+    _streams = streams
+
+
+def replay_orders(trader_file: str) -> dict[str, list[TickOrders] | str]:
+    """Orders per tick of every stream for one trader; a stream the trader raises on holds the error instead."""
+    trader_cls = load_trader(trader_file)
+    results: dict[str, list[TickOrders] | str] = {}
+    with open(os.devnull, "w") as sink, redirect_stdout(sink):
+        for name, states in _streams.items():
+            trader = trader_cls()
+            trader_data = ""
+            ticks = []
+            try:
+                for state in states:
+                    orders, conversions, trader_data = trader.run(copy_state(state, trader_data))
+                    ticks.append((tuple((order.symbol, int(order.price), int(order.quantity))
+                                        for symbol_orders in orders.values() for order in symbol_orders),
+                                  int(conversions or 0)))
+            except Exception as e:
+                results[name] = f"{type(e).__name__}: {e}"
+                continue
+            results[name] = ticks
+    return results
+
+
+def build_streams(days: list[int], reference: str | None, log_path: str | None, round_num: int = 1) -> dict[str, list[TradingState]]:
+    if log_path:
+        return {os.path.basename(log_path): load_states(log_path)}
+    streams = {}
+    for day in days:
+        data = load_day(round_num, day)
+        positions = run_backtest(load_trader(reference)(), data).positions if reference else None
+        streams[f"day {day}"] = day_states(data, positions)
+    return streams
+
+
+def diff_orders(trader_files: list[str], streams: dict[str, list[TradingState]],
+                workers: int | None = None) -> tuple[dict[str, dict], list[tuple[str, int, int, list]]]:
+    """Replay every trader and return (per-trader results, diverging ticks as (stream, tick, timestamp, orders per trader))."""
+    workers = min(workers or os.cpu_count() or 1, len(trader_files))
+    if workers == 1:
+        init_worker(streams)
+        results = [replay_orders(trader_file) for trader_file in trader_files]
+    else:
+        with process_pool(workers, init_worker, (streams,)) as executor:
+            results = list(executor.map(replay_orders, trader_files))
+
+    by_trader = dict(zip(trader_files, results))
+    diverging = []
+    for name, states in streams.items():
+        runs = [result[name] for result in results]
+        if any(isinstance(run, str) for run in runs):
+            continue
+        for tick, orders in enumerate(zip(*runs)):
+            if any(other != orders[0] for other in orders[1:]):
+                diverging.append((name, tick, states[tick].timestamp, list(orders)))
+    return by_trader, diverging
+
+
+def format_orders(orders: TickOrders) -> str:
+    sent, conversions = orders
+    text = " ".join(f"{symbol}:{quantity:+d}@{price}" for symbol, price, quantity in sent) or "no orders"
+    return text + (f" conversions {conversions}" if conversions else "")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the orders of several Trader versions on the same states")
+    parser.add_argument("traders", nargs="+")
+    parser.add_argument("--round", type=int, default=1)
+    parser.add_argument("--days", type=int, nargs="+", default=[-2, -1, 0])
+    parser.add_argument("--log", help="replay the states of a backtest log instead of the round's days")
+    parser.add_argument("--flat", action="store_true", help="send flat positions instead of the first trader's")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--show", type=int, default=5, help="diverging ticks to print with their orders")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    streams = build_streams(args.days, None if args.flat else args.traders[0], args.log, args.round)
+    built = time.perf_counter() - start
+    by_trader, diverging = diff_orders(args.traders, streams, args.workers)
+    elapsed = time.perf_counter() - start
+
+    ticks = sum(len(states) for states in streams.values())
+    for trader_file, results in by_trader.items():
+        for name, result in results.items():
+            if isinstance(result, str):
+                print(f"{trader_file} failed on {name}: {result}")
+    print(f"{len(args.traders)} traders x {ticks} ticks: {len(diverging)} diverging ticks "
+          f"({built:.1f}s building states, {elapsed:.1f}s total)")
+    for name in streams:
+        stream_ticks = [tick for stream, tick, _, _ in diverging if stream == name]
+        if stream_ticks:
+            print(f"  {name}: {len(stream_ticks)} ticks, first at tick {stream_ticks[0]}")
+
+    for name, tick, timestamp, orders in diverging[:args.show]:
+        print(f"{name} tick {tick} (timestamp {timestamp}):")
+        for trader_file, tick_orders in zip(args.traders, orders):
+            print(f"  {trader_file:<20} {format_orders(tick_orders)}")
+    if diverging:
+        sys.exit(1)
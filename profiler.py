@@ -0,0 +1,169 @@
+"""Per-tick latency of Trader.run and its stages during a backtest.
+
+The profiler wraps the chosen methods on one trader instance (and flush on its module's
+Logger) with perf_counter_ns timers, and restores them on detach(). Nothing in the trader files
+changes, so a trader that is not attached runs exactly as uploaded.
+
+    python profiler.py [trader.py] [round] [days...] [--stages run orders_for flush] [--worst 5]
+"""
+import argparse
+import heapq
+import itertools
+import os
+import sys
+import time
+from typing import Any
+
+import numpy as np
+
+from backtester import load_day, load_trader, run_backtest
+from datacache import DATA_DIR
+from datamodel import Symbol, TradingState
+
+DEFAULT_STAGES = ["run", "orders_for", "flush"]
+# Stages whose first argument is the product they work on; their calls are reported per product
+PRODUCT_STAGES = {"orders_for"}
+
+
+class StageProfiler:
+    """Records the duration of every call to each stage.
+
+    Calls to a PRODUCT_STAGES method are reported under the product they were made for, the
+    others under "all". The `worst` slowest ticks of run keep a copy of their order depths.
+    """
+
+    def __init__(self, stages: list[str] = DEFAULT_STAGES, worst: int = 5) -> None:
+        self.stages = stages
+        self.worst = worst
+        # (stage, product) -> call durations in ns
+        self.timings: dict[tuple[str, str], list[int]] = {}
+        # (elapsed, timestamp, tiebreak, books); the counter keeps heapq from ever comparing books
+        self.worst_ticks: list[tuple[int, int, int, dict[Symbol, tuple[dict[int, int], dict[int, int]]]]] = []
+        self.counter = itertools.count()
+        self.patched: list[tuple[Any, str]] = []
+
+    def attach(self, trader: Any) -> "StageProfiler":
+        logger = getattr(sys.modules.get(type(trader).__module__), "logger", None)
+        for stage in self.stages:
+            if stage == "flush" and logger is not None:
+                self.patch(logger, "flush", self.timed("flush", logger.flush))
+            elif stage == "run":
+                self.patch(trader, "run", self.timed_run(trader.run))
+            elif callable(getattr(trader, stage, None)):
+                self.patch(trader, stage, self.timed(stage, getattr(trader, stage)))
+            else:
+                self.detach()
+                raise ValueError(f"{type(trader).__name__} has no method {stage!r} to profile")
+        return self
+
+    def detach(self) -> None:
+        for owner, name in self.patched:
+            delattr(owner, name)
+        self.patched = []
+
+    def patch(self, owner: Any, name: str, wrapper: Any) -> None:
+        setattr(owner, name, wrapper)
+        self.patched.append((owner, name))
+
+    def timed(self, stage: str, method: Any) -> Any:
+        clock = time.perf_counter_ns
+        if stage in PRODUCT_STAGES:
+            timings = self.timings
+
+            def product_wrapper(product, *args, **kwargs):
+                start = clock()
+                result = method(product, *args, **kwargs)
+                elapsed = clock() - start
+                timings.setdefault((stage, product), []).append(elapsed)
+                return result
+            return product_wrapper
+
+        stage_timings = self.timings.setdefault((stage, "all"), [])
+
+        def wrapper(*args, **kwargs):
+            start = clock()
+            result = method(*args, **kwargs)
+            stage_timings.append(clock() - start)
+            return result
+        return wrapper
+
+    def timed_run(self, method: Any) -> Any:
+        timings = self.timings.setdefault(("run", "all"), [])
+        clock = time.perf_counter_ns
+
+        def wrapper(state: TradingState):
+            start = clock()
+            result = method(state)
+            elapsed = clock() - start
+            timings.append(elapsed)
+            # Copied only when the tick makes the worst list; the backtester consumes the book after run returns
+            if len(self.worst_ticks) < self.worst or elapsed > self.worst_ticks[0][0]:
+                books = {symbol: (dict(depth.buy_orders), dict(depth.sell_orders))
+                         for symbol, depth in state.order_depths.items()}
+                entry = (elapsed, state.timestamp, next(self.counter), books)
+                if len(self.worst_ticks) < self.worst:
+                    heapq.heappush(self.worst_ticks, entry)
+                else:
+                    heapq.heapreplace(self.worst_ticks, entry)
+            return result
+        return wrapper
+
+    def summary(self) -> list[dict[str, Any]]:
+        rows = []
+        for (stage, product), timings in sorted(self.timings.items(), key=lambda item: self.stages.index(item[0][0])):
+            if not timings:
+                continue
+            values = np.array(timings) / 1000
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            rows.append({"stage": stage, "product": product, "calls": len(values),
+                         "mean_us": values.mean(), "p50_us": p50, "p95_us": p95, "p99_us": p99, "max_us": values.max()})
+        return rows
+
+    def histogram(self, stage: str, product: str = "all", width: int = 40) -> list[str]:
+        """Text histogram of a stage's latencies in power-of-two microsecond buckets."""
+        values = np.maximum(np.array(self.timings[(stage, product)]) / 1000, 1)
+        buckets = np.floor(np.log2(values)).astype(int)
+        counts = np.bincount(buckets - buckets.min())
+        lines = []
+        for i, count in enumerate(counts):
+            low = 2 ** (buckets.min() + i)
+            bar = "#" * int(round(width * count / counts.max()))
+            lines.append(f"  {low:>7}-{low * 2:<7}us {count:>7} {bar}")
+        return lines
+
+    def report(self) -> None:
+        rows = self.summary()
+        print(f"{'stage':<10} {'product':<10} {'calls':>7} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}  (us)")
+        for row in rows:
+            print(f"{row['stage']:<10} {row['product']:<10} {row['calls']:>7} {row['mean_us']:>9.1f} {row['p50_us']:>9.1f} "
+                  f"{row['p95_us']:>9.1f} {row['p99_us']:>9.1f} {row['max_us']:>9.1f}")
+        for row in rows:
+            print(f"{row['stage']} ({row['product']}):")
+            print("\n".join(self.histogram(row["stage"], row["product"])))
+        print(f"Worst {len(self.worst_ticks)} ticks of run:")
+        for elapsed, timestamp, _, books in sorted(self.worst_ticks, reverse=True):
+            print(f"  t={timestamp}: {elapsed / 1000:.1f}us")
+            for symbol, (buy_orders, sell_orders) in books.items():
+                print(f"    {symbol}: buy {buy_orders} sell {sell_orders}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-stage latency of Trader.run over a backtest")
+    parser.add_argument("trader", nargs="?", default=os.path.join(DATA_DIR, "trader.py"))
+    parser.add_argument("round", nargs="?", type=int, default=1)
+    parser.add_argument("days", nargs="*", type=int)
+    parser.add_argument("--stages", nargs="+", default=DEFAULT_STAGES)
+    parser.add_argument("--worst", type=int, default=5)
+    args = parser.parse_args()
+
+    trader_cls = load_trader(args.trader)
+    profiler = StageProfiler(args.stages, args.worst)
+    for day in args.days or [-2, -1, 0]:
+        data = load_day(args.round, day)
+        trader = trader_cls()
+        profiler.attach(trader)
+        try:
+            run_backtest(trader, data)
+        finally:
+            profiler.detach()
+    profiler.report()
@@ -0,0 +1,240 @@
+"""Disk cache of backtest results, keyed by what the result depends on.
+
+The key hashes the trader file's source and the backtester's own modules, the parameter
+overrides, the run options and the size and mtime of the day's prices and trades files and of
+any file a parameter names (relative names are taken from the trader's directory). Editing any
+of them misses the cache; rerunning a sweep or notebook cell with nothing changed
+reads the stored result instead of replaying the day.
+
+Each entry is one compressed .npz holding the PnL path, per-tick positions and fills as
+arrays. The cache is bounded by total size: a hit refreshes the entry's mtime and a store
+evicts the least recently used entries until the directory is under max_bytes.
+
+    python resultcache.py [trader.py] [round] [days...] [--clear]
+"""
+import hashlib
+import json
+import os
+import sys
+import time
+import zipfile
+from typing import Any
+
+import numpy as np
+
+from backtester import DATA_DIR, BacktestResult, prices_path, trades_path
+from datacache import MISSING
+from datamodel import Trade
+
+CACHE_DIR = os.path.join(DATA_DIR, ".cache", "backtests")
+MAX_BYTES = 256 * 1024 * 1024
+# Modules whose behaviour is part of every result: the backtester and everything it imports
+ENGINE_FILES = [os.path.join(DATA_DIR, name) for name in ("backtester.py", "datacache.py", "datamodel.py", "observations.py")]
+
+
+def file_fingerprint(path: str) -> str:
+    if not os.path.exists(path):
+        return f"{path}|missing"
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+
+
+def source_hash(trader_file: str) -> str:
+    """Hash of the trader's source and the backtester modules."""
+    digest = hashlib.sha1()
+    for path in [trader_file, *ENGINE_FILES]:
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def encode_result(result: BacktestResult) -> dict[str, np.ndarray]:
+    products = list(result.pnl)
+    symbols = sorted({symbol for position in result.positions for symbol in position})
+    positions = np.full((len(result.positions), len(symbols)), MISSING, dtype=np.int32)
+    for i, position in enumerate(result.positions):
+        for j, symbol in enumerate(symbols):
+            if symbol in position:
+                positions[i, j] = position[symbol]
+
+    fills = result.fills
+    names = sorted({name for fill in fills for name in (fill.symbol, fill.buyer, fill.seller) if name is not None})
+    index = {name: i for i, name in enumerate(names)}
+    # -1 stands for a buyer or seller of None
+    codes = np.array([[index.get(name, -1) for name in (fill.symbol, fill.buyer, fill.seller)] for fill in fills],
+                     dtype=np.int32).reshape(len(fills), 3)
+    return {
+        "day": np.array(result.day),
+        "products": np.array(result.products, dtype=str),
+        "pnl_products": np.array(products, dtype=str),
+        "pnl": np.array([result.pnl[product] for product in products], dtype=np.float64),
+        "timestamps": np.array(result.timestamps, dtype=np.int64),
+        "pnl_path": np.array(result.pnl_path, dtype=np.float64),
+        "position_symbols": np.array(symbols, dtype=str),
+        "positions": positions,
+        "fill_names": np.array(names, dtype=str),
+        "fill_codes": codes,
+        "fill_prices": np.array([fill.price for fill in fills]),
+        "fill_quantities": np.array([fill.quantity for fill in fills], dtype=np.int64),
+        "fill_timestamps": np.array([fill.timestamp for fill in fills], dtype=np.int64),
+    }
+
+
+def decode_result(arrays: Any) -> BacktestResult:
+    result = BacktestResult(int(arrays["day"]), arrays["products"].tolist())
+    result.pnl = dict(zip(arrays["pnl_products"].tolist(), arrays["pnl"].tolist()))
+    result.timestamps = arrays["timestamps"].tolist()
+    result.pnl_path = arrays["pnl_path"].tolist()
+
+    symbols = arrays["position_symbols"].tolist()
+    result.positions = [{symbol: value for symbol, value in zip(symbols, row) if value != MISSING}
+                        for row in arrays["positions"].tolist()]
+
+    names = arrays["fill_names"].tolist()
+    codes = arrays["fill_codes"]
+    buyers = [names[code] if code >= 0 else None for code in codes[:, 1].tolist()]
+    sellers = [names[code] if code >= 0 else None for code in codes[:, 2].tolist()]
+    result.fills = Trade.batch([names[code] for code in codes[:, 0].tolist()], arrays["fill_prices"].tolist(),
+                               arrays["fill_quantities"].tolist(), buyers, sellers, arrays["fill_timestamps"].tolist())
+    return result
+
+
+class ResultCache:
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = MAX_BYTES) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def key(self, source: str, round_num: int, day: int, params: dict[str, Any] | None = None,
+            data_dir: str = DATA_DIR, trader_dir: str = DATA_DIR, **options: Any) -> str:
+        """Entry name for a backtest; source is source_hash() of the trader file and trader_dir its directory."""
+        # A parameter naming a file depends on its contents too; like the trader, relative names
+        # are taken from the trader's directory rather than the working directory
+        param_paths = {name: os.path.join(trader_dir, value) for name, value in (params or {}).items()
+                       if isinstance(value, str)}
+        fields = {
+            "source": source,
+            "round": round_num,
+            "day": day,
+            "data": [file_fingerprint(prices_path(round_num, day, data_dir)),
+                     file_fingerprint(trades_path(round_num, day, data_dir))],
+            "params": params or {},
+            "param_files": {name: file_fingerprint(path) for name, path in param_paths.items() if os.path.isfile(path)},
+            "options": options,
+        }
+        text = json.dumps(fields, sort_keys=True, default=repr)
+        return hashlib.sha1(text.encode()).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".npz")
+
+    def get(self, key: str) -> BacktestResult | None:
+        path = self.path(key)
+        try:
+            with np.load(path) as arrays:
+                result = decode_result(arrays)
+            os.utime(path)
+        except FileNotFoundError:
+            # Missing, or evicted by another process mid-read
+            return None
+        except (OSError, EOFError, ValueError, KeyError, zipfile.BadZipFile):
+            # Truncated by an interrupted write or written by an older layout: drop it so the rerun replaces it
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            return None
+        return result
+
+    def put(self, key: str, result: BacktestResult) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(tmp_path, **encode_result(result))
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def entries(self) -> list[tuple[float, int, str]]:
+        """(mtime, size, path) of every entry, least recently used first."""
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".npz") and ".tmp." not in entry.name:
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return sorted(entries)
+
+    def evict(self) -> None:
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self) -> None:
+        for _, _, path in self.entries():
+            os.remove(path)
+
+
+def cached_backtest(trader_file: str, round_num: int, day: int, params: dict[str, Any] | None = None,
+                    cache: ResultCache | None = None, data_dir: str = DATA_DIR, **options: Any) -> BacktestResult:
+    """run_backtest of trader_file with params set on the trader, read from the cache when nothing changed.
+
+    The day is only loaded on a miss, so a hit returns without touching the data files.
+    """
+    from backtester import load_day, load_trader, run_backtest
+    from sweep import set_param
+
+    cache = cache or ResultCache()
+    key = cache.key(source_hash(trader_file), round_num, day, params, data_dir,
+                    os.path.dirname(os.path.abspath(trader_file)), **options)
+    result = cache.get(key)
+    if result is None:
+        trader = load_trader(trader_file)()
+        for name, value in (params or {}).items():
+            set_param(trader, name, value)
+        result = run_backtest(trader, load_day(round_num, day, data_dir), **options)
+        cache.put(key, result)
+    return result
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if arg != "--clear"]
+    trader_file = args[0] if len(args) > 0 else os.path.join(DATA_DIR, "trader.py")
+    round_num = int(args[1]) if len(args) > 1 else 1
+    days = [int(day) for day in args[2:]] or [-2, -1, 0]
+
+    cache = ResultCache()
+    if len(args) < len(sys.argv) - 1:
+        cache.clear()
+
+    from backtester import load_day, load_trader, run_backtest
+
+    for day in days:
+        start = time.perf_counter()
+        result = cached_backtest(trader_file, round_num, day, cache=cache)
+        first = time.perf_counter() - start
+        start = time.perf_counter()
+        again = cached_backtest(trader_file, round_num, day, cache=cache)
+        second = time.perf_counter() - start
+
+        # A stored result must decode to the run it came from
+        fresh = run_backtest(load_trader(trader_file)(), load_day(round_num, day))
+        assert again.pnl == fresh.pnl and again.pnl_path == fresh.pnl_path and again.positions == fresh.positions
+        assert [[getattr(fill, name) for name in Trade.__slots__] for fill in again.fills] == \
+               [[getattr(fill, name) for name in Trade.__slots__] for fill in fresh.fills]
+        print(f"Day {day}: PnL {again.total_pnl:,.1f}, first call {first * 1000:.0f}ms, "
+              f"second {second * 1000:.0f}ms")
+    entries = cache.entries()
+    print(f"{len(entries)} entries, {sum(size for _, size, _ in entries) / 1024:.0f}KB in {cache.cache_dir}")
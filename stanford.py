@@ -9,35 +9,72 @@ import math
 import copy
 
 class Logger:
-    def __init__(self) -> None:
+    def __init__(self, delta_books: bool = False, keyframe_interval: int = 100) -> None:
         self.logs = ""
         self.max_log_length = 3750
+        # In delta mode order depths are logged relative to the previously logged books,
+        # with a full keyframe every keyframe_interval ticks (see logparser.BookDecoder)
+        self.delta_books = delta_books
+        self.keyframe_interval = keyframe_interval
+        self.ticks_since_keyframe = 0
+        self.last_books: dict[Symbol, tuple[dict[int, int], dict[int, int]]] = {}
 
     def print(self, *objects: Any, sep: str = " ", end: str = "\n") -> None:
         self.logs += sep.join(map(str, objects)) + end
 
     def flush(self, state: TradingState, orders: dict[Symbol, list[Order]], conversions: int, trader_data: str) -> None:
-        base_length = len(self.to_json([
-            self.compress_state(state, ""),
-            self.compress_orders(orders),
-            conversions,
-            "",
-            "",
-        ]))
-
-        # We truncate state.traderData, trader_data, and self.logs to the same max. length to fit the log limit
-        max_item_length = (self.max_log_length - base_length) // 3
-
-        print(self.to_json([
-            self.compress_state(state, self.truncate(state.traderData, max_item_length)),
-            self.compress_orders(orders),
-            conversions,
-            self.truncate(trader_data, max_item_length),
-            self.truncate(self.logs, max_item_length),
-        ]))
+        # Everything except the three free-form strings is encoded once; the strings are
+        # spliced into their slots after the leftover budget has been split between them
+        state_json = self.to_json(self.compress_state(state, "")[2:])
+        head = "[[" + self.to_json(state.timestamp) + ","
+        middle = "," + state_json[1:-1] + "]," + self.to_json(self.compress_orders(orders)) + "," + self.to_json(conversions) + ","
+
+        values = [state.traderData, trader_data, self.logs]
+        needs = [self.encoded_length(value) for value in values]
+        base_length = len(head) + len(middle) + 2 + 3 * len('""')
+        budgets = self.allocate(needs, self.max_log_length - base_length)
+        traderData, trader_data, logs = (self.truncate(*args) for args in zip(values, needs, budgets))
+
+        print(head + traderData + middle + trader_data + "," + logs + "]")
 
         self.logs = ""
 
+    def allocate(self, needs: list[int], available: int) -> list[int]:
+        # Smallest need first: whatever a short field leaves unused goes to the longer ones
+        budgets = [0] * len(needs)
+        available = max(available, 0)
+        order = sorted(range(len(needs)), key=needs.__getitem__)
+        for i, index in enumerate(order):
+            budgets[index] = min(needs[index], available // (len(needs) - i))
+            available -= budgets[index]
+
+        return budgets
+
+    def encoded_length(self, value: str) -> int:
+        # Length of value's JSON literal without the quotes, counting the escapes logs usually
+        # contain; other control and non-ASCII characters make it an underestimate
+        return len(value) + value.count('"') + value.count('\\') + value.count('\n')
+
+    def truncate(self, value: str, estimate: int, max_length: int) -> str:
+        # Returns value's JSON literal with its contents (escapes included) cut to max_length
+        if estimate <= max_length:
+            encoded = json.dumps(value)
+            if len(encoded) - 2 <= max_length:
+                return encoded
+            estimate = len(encoded) - 2
+        if max_length < 3:
+            return '""'
+
+        # Only the part that can be kept is encoded: the raw text is cut assuming it escapes at the
+        # string's average rate. Every character encodes to at least one, so dropping the
+        # overshoot in characters always fits
+        cut = (max_length - 3) * len(value) // estimate
+        truncated = json.dumps(value[:cut] + "...")
+        overshoot = len(truncated) - 2 - max_length
+        if overshoot > 0:
+            truncated = json.dumps(value[:max(cut - overshoot, 0)] + "...")
+        return truncated
+
     def compress_state(self, state: TradingState, trader_data: str) -> list[Any]:
         return [
             state.timestamp,
@@ -57,11 +94,43 @@ class Logger:
 
         return compressed
 
-    def compress_order_depths(self, order_depths: dict[Symbol, OrderDepth]) -> dict[Symbol, list[Any]]:
+    def compress_order_depths(self, order_depths: dict[Symbol, OrderDepth]) -> dict[Symbol, list[Any]] | list[Any]:
         compressed = {}
         for symbol, order_depth in order_depths.items():
             compressed[symbol] = [order_depth.buy_orders, order_depth.sell_orders]
 
+        if self.delta_books:
+            return self.compress_book_deltas(compressed)
+
+        return compressed
+
+    def compress_book_deltas(self, books: dict[Symbol, list[Any]]) -> list[Any]:
+        # ["K", books] is a full keyframe. ["D", changes] holds only the symbols whose book changed
+        # since the previous record, each side as a flat [price offset, volume, ...] list with prices
+        # relative to the first level of that side in the previous record and sell volumes made positive
+        if self.ticks_since_keyframe == 0 or books.keys() != self.last_books.keys():
+            compressed = ["K", books]
+            self.ticks_since_keyframe = 0
+        else:
+            changes = {}
+            for symbol, (buy_orders, sell_orders) in books.items():
+                last_buy_orders, last_sell_orders = self.last_books[symbol]
+                if buy_orders != last_buy_orders or sell_orders != last_sell_orders:
+                    changes[symbol] = [self.delta_levels(last_buy_orders, buy_orders, 1),
+                                       self.delta_levels(last_sell_orders, sell_orders, -1)]
+            compressed = ["D", changes]
+
+        self.last_books = {symbol: (dict(buy_orders), dict(sell_orders)) for symbol, (buy_orders, sell_orders) in books.items()}
+        self.ticks_since_keyframe = (self.ticks_since_keyframe + 1) % self.keyframe_interval
+        return compressed
+
+    def delta_levels(self, last: dict[int, int], current: dict[int, int], sign: int) -> list[int]:
+        reference = next(iter(last), 0)
+        compressed = []
+        for price, volume in current.items():
+            compressed.append(price - reference)
+            compressed.append(sign * volume)
+
         return compressed
 
     def compress_trades(self, trades: dict[Symbol, list[Trade]]) -> list[list[Any]]:
@@ -105,12 +174,6 @@ class Logger:
     def to_json(self, value: Any) -> str:
         return json.dumps(value, cls=ProsperityEncoder, separators=(",", ":"))
 
-    def truncate(self, value: str, max_length: int) -> str:
-        if len(value) <= max_length:
-            return value
-
-        return value[:max_length - 3] + "..."
-
 logger = Logger()
 empty_dict = {'AMETHYSTS' : 0, 'STARFRUIT' : 0}
 def def_value():
@@ -258,7 +258,7 @@ class Trader:
                         alrBought -= ask_amount
                         orders['STARFRUIT'].append(Order(prod, ask, -ask_amount))
                     else:
-                        num = np.ceil(max(20 - self.position[prod] - alrBought, 0))
+                        num = int(np.ceil(max(20 - self.position[prod] - alrBought, 0)))
                         orders['STARFRUIT'].append(Order(prod, ask, num))
                         alrBought += num
                         logger.print("num: " + str(num))
@@ -275,7 +275,7 @@ class Trader:
                         alrSold += bid_amount
                         orders['STARFRUIT'].append(Order(prod, bid, -bid_amount))
                     else:
-                        num = np.ceil(min(-20 - self.position[prod] + alrSold, 0))
+                        num = int(np.ceil(min(-20 - self.position[prod] + alrSold, 0)))
                         orders['STARFRUIT'].append(Order(prod, bid, num))
                         alrSold -= num
                         logger.print("num: " + str(num))
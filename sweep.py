@@ -0,0 +1,166 @@
+import argparse
+import ast
+import copy
+import csv
+import itertools
+import os
+import sys
+import time
+from typing import Any
+
+from backtester import DATA_DIR, BacktestResult, DayData, load_day, load_trader, process_pool, run_backtest
+from resultcache import ResultCache, source_hash
+
+# Set once per worker by init_worker. Under fork the parsed days are inherited
+# from the parent, otherwise they are pickled once per worker rather than per task.
+_trader_cls = None
+_days: dict[int, DayData] = {}
+_cache: ResultCache | None = None
+_source = ""
+_data_dir = DATA_DIR
+_trader_dir = DATA_DIR
+
+
+def expand_grid(grid: dict[str, list[Any]]) -> list[dict[str, Any]]:
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def init_worker(trader_file: str, days: dict[int, DayData], cache: ResultCache | None = None, source: str = "",
+                data_dir: str = DATA_DIR) -> None:
+    global _trader_cls, _days, _cache, _source, _data_dir, _trader_dir
+    _trader_cls = load_trader(trader_file)
+    _trader_dir = os.path.dirname(os.path.abspath(trader_file))
+    _days = days
+    _cache = cache
+    _source = source
+    _data_dir = data_dir
+
+
+def set_param(trader: Any, name: str, value: Any) -> None:
+    # Parameters override class attributes on the instance, e.g. rls_forgetting or stanford.py's
+    # std. Attributes derived from them at class creation (alpha_*) are not recomputed.
+    # A dotted name sets one entry of a nested dict, e.g. products.AMETHYSTS.ask_offset; the dicts
+    # on the path are copied first so the class attribute stays untouched.
+    attribute, *keys = name.split(".")
+    if not keys:
+        setattr(trader, attribute, value)
+        return
+    container = copy.deepcopy(getattr(trader, attribute))
+    setattr(trader, attribute, container)
+    for key in keys[:-1]:
+        container = container[key]
+    container[keys[-1]] = value
+
+
+def run_point(task: tuple[int, dict[str, Any], int]) -> dict[str, Any]:
+    index, params, day = task
+    trader = _trader_cls()
+    for name, value in params.items():
+        set_param(trader, name, value)
+
+    result = run_backtest(trader, _days[day])
+    if _cache is not None:
+        _cache.put(_cache.key(_source, _days[day].round_num, day, params, _data_dir, _trader_dir), result)
+    return result_row(index, params, day, result)
+
+
+def result_row(index: int, params: dict[str, Any], day: int, result: BacktestResult) -> dict[str, Any]:
+    row = {"index": index, **params, "day": day}
+    for product, pnl in result.pnl.items():
+        row[f"pnl_{product}"] = pnl
+    row["pnl"] = result.total_pnl
+    row["max_drawdown"] = result.max_drawdown
+    row["fills"] = len(result.fills)
+    return row
+
+
+def run_sweep(trader_file: str, grid: dict[str, list[Any]], days: list[int], round_num: int = 1,
+              workers: int | None = None, data_dir: str = DATA_DIR,
+              use_cache: bool = True) -> list[dict[str, Any]]:
+    """Backtest every (parameter set, day) pair on a process pool and return one row per pair.
+
+    With use_cache, pairs already in the result cache are read from it and only the rest load
+    their day and run; their results are stored for the next sweep.
+    """
+    points = expand_grid(grid)
+    cache = ResultCache() if use_cache else None
+    source = source_hash(trader_file)
+    trader_dir = os.path.dirname(os.path.abspath(trader_file))
+    rows = []
+    tasks = []
+    for index, params in enumerate(points):
+        for day in days:
+            result = cache.get(cache.key(source, round_num, day, params, data_dir, trader_dir)) if cache is not None else None
+            if result is not None:
+                rows.append(result_row(index, params, day, result))
+            else:
+                tasks.append((index, params, day))
+
+    data = {day: load_day(round_num, day, data_dir) for day in sorted({day for _, _, day in tasks})}
+    workers = min(workers or os.cpu_count() or 1, max(len(tasks), 1))
+    if tasks and workers == 1:
+        init_worker(trader_file, data, cache, source, data_dir)
+        rows += [run_point(task) for task in tasks]
+    elif tasks:
+        with process_pool(workers, init_worker, (trader_file, data, cache, source, data_dir)) as executor:
+            chunksize = max(1, len(tasks) // (workers * 4))
+            rows += list(executor.map(run_point, tasks, chunksize=chunksize))
+
+    return sorted(rows, key=lambda row: (row["index"], row["day"]))
+
+
+def summarize(rows: list[dict[str, Any]], params: list[str]) -> list[dict[str, Any]]:
+    """Collapse per-day rows into one row per parameter set, best total PnL first."""
+    summary: dict[int, dict[str, Any]] = {}
+    for row in rows:
+        if row["index"] not in summary:
+            summary[row["index"]] = {**{name: row[name] for name in params}, "pnl": 0.0, "max_drawdown": 0.0, "fills": 0}
+        entry = summary[row["index"]]
+        entry["pnl"] += row["pnl"]
+        entry["max_drawdown"] = max(entry["max_drawdown"], row["max_drawdown"])
+        entry["fills"] += row["fills"]
+
+    return sorted(summary.values(), key=lambda entry: entry["pnl"], reverse=True)
+
+
+def write_csv(rows: list[dict[str, Any]], path: str) -> None:
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]), delimiter=";")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def parse_param(arg: str) -> tuple[str, list[Any]]:
+    # products.AMETHYSTS.ask_offset=2,3,4 or starfruit_coefs=[...],[...]: the right-hand side is one
+    # literal and a tuple lists the candidates, so list values keep their commas. A single tuple
+    # value needs a trailing comma, e.g. name=(1,2),
+    name, values = arg.split("=", 1)
+    values = ast.literal_eval(values)
+    return name, list(values) if isinstance(values, tuple) else [values]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parameter sweep over Trader class attributes")
+    parser.add_argument("trader", help="trader file, e.g. trader.py")
+    parser.add_argument("params", nargs="+", help="name=v1,v2,... for each swept attribute; values are Python literals, e.g. starfruit_coefs=[...],[...]")
+    parser.add_argument("--round", type=int, default=1)
+    parser.add_argument("--days", type=int, nargs="+", default=[-2, -1, 0])
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", help="write the per-day result table to this CSV")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--no-cache", action="store_true", help="rerun every backtest and leave the result cache alone")
+    args = parser.parse_args()
+
+    grid = dict(parse_param(arg) for arg in args.params)
+    start = time.perf_counter()
+    rows = run_sweep(args.trader, grid, args.days, args.round, args.workers,
+                     use_cache=not args.no_cache)
+    elapsed = time.perf_counter() - start
+
+    if args.out:
+        write_csv(rows, args.out)
+
+    for entry in summarize(rows, list(grid))[:args.top]:
+        print(entry)
+    print(f"{len(rows)} backtests in {elapsed:.1f}s", file=sys.stderr)
@@ -0,0 +1,40 @@
+import pytest
+
+from backtester import load_day, run_backtest
+from datamodel import Order
+
+DAY = -1
+
+
+class ShortThenImport:
+    """Sells ORCHIDS at a fixed price on the first tick, then imports the short back on the second."""
+
+    def __init__(self, symbol="ORCHIDS"):
+        self.symbol = symbol
+        self.ticks = 0
+
+    def run(self, state):
+        self.ticks += 1
+        orders = {self.symbol: [Order(self.symbol, 1000, -10)]} if self.ticks == 1 else {}
+        return orders, 10 if self.ticks == 2 else 0, ""
+
+
+def test_conversions_flatten_the_position_at_the_import_price():
+    data = load_day(2, DAY)
+    data.timestamps = data.timestamps[:3]
+    first = data.timestamps[0]
+    # Round-2 files carry no book, so give the first tick one to sell into
+    data.books[first]["ORCHIDS"] = ({1000: 10}, {})
+    result = run_backtest(ShortThenImport(), data)
+
+    observation = data.observations[1].conversionObservations["ORCHIDS"]
+    import_price = observation.askPrice + observation.transportFees + observation.importTariff
+    assert [position.get("ORCHIDS", 0) for position in result.positions] == [-10, 0, 0]
+    assert result.pnl["ORCHIDS"] == pytest.approx(10 * (1000 - import_price))
+
+
+def test_orders_for_a_product_without_a_limit_raise():
+    data = load_day(2, DAY)
+    data.timestamps = data.timestamps[:2]
+    with pytest.raises(ValueError, match="no position limit"):
+        run_backtest(ShortThenImport("GIFT_BASKET"), data)
@@ -0,0 +1,54 @@
+import numpy as np
+
+from backtester import load_day, prices_path, run_backtest, trades_path
+from batchfeatures import parity_mismatches
+from coefficients import RETURN_LAGS, lagged_return, return_std, tick_returns
+from datacache import load_csv
+from observations import load_columns
+from trader import Trader
+
+DAY = -2
+TICKS = 500
+
+
+class RecordingTrader(Trader):
+    """Trader that keeps the [r1..r5, std] row predict_returns sees on each tick."""
+
+    def __init__(self):
+        super().__init__()
+        self.timestamp = None
+        self.features = []
+
+    def run(self, state):
+        self.timestamp = state.timestamp
+        return super().run(state)
+
+    def predict_returns(self, returns):
+        row = [returns[-lag] for lag in range(1, RETURN_LAGS + 1)] + [returns.std()]
+        self.features.append((self.timestamp, row))
+        return super().predict_returns(returns)
+
+
+def test_batch_features_match_feature_engine():
+    data = load_day(1, DAY)
+    data.timestamps = data.timestamps[:TICKS]
+    assert parity_mismatches(data, load_csv(prices_path(1, DAY)), load_csv(trades_path(1, DAY))) == []
+
+
+def test_trader_features_match_fitted_columns():
+    data = load_day(1, DAY)
+    data.timestamps = data.timestamps[:TICKS]
+    trader = RecordingTrader()
+    run_backtest(trader, data)
+
+    # The coefficients are fitted on these columns; a tick's live features are the previous row's
+    columns = load_columns(prices_path(1, DAY))
+    returns = tick_returns(columns.prices["STARFRUIT"])
+    offline = np.column_stack([lagged_return(returns, lag) for lag in range(1, RETURN_LAGS + 1)]
+                              + [return_std(returns, RETURN_LAGS)])
+    timestamps = np.array([timestamp for timestamp, _ in trader.features])
+    live = np.array([row for _, row in trader.features])
+    rows = np.searchsorted(columns.timestamps, timestamps) - 1
+
+    assert len(live) > TICKS - 10
+    assert np.allclose(live, offline[rows], rtol=1e-9, atol=1e-15)
@@ -0,0 +1,26 @@
+import numpy as np
+
+from backtester import prices_path
+from coefficients import NormalEquations, return_features
+from observations import load_columns
+from trader import RecursiveLeastSquares
+
+DAY = -2
+PRIOR_ROWS = 1000
+
+
+def test_rls_without_forgetting_reproduces_ols():
+    x, y = return_features(load_columns(prices_path(1, DAY)).prices["STARFRUIT"])
+    start = NormalEquations(x.shape[1])
+    start.add(x[:PRIOR_ROWS], y[:PRIOR_ROWS])
+    total = NormalEquations(x.shape[1])
+    total.add(x, y)
+
+    # Started from the fit of the first rows with their (X^T X)^-1, RLS over the rest is the fit of all rows
+    beta = start.solve()
+    model = RecursiveLeastSquares(beta[1:].tolist() + [beta[0]], start.rls_prior())
+    for row, target in zip(x[PRIOR_ROWS:].tolist(), y[PRIOR_ROWS:].tolist()):
+        model.update(row + [1.0], target, 1.0)
+
+    expected = total.solve()
+    assert np.allclose(model.theta, expected[1:].tolist() + [expected[0]], rtol=1e-6, atol=1e-12)
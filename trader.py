@@ -1,38 +1,76 @@
+import base64
 import json
+import struct
 from datamodel import Listing, Observation, Order, OrderDepth, ProsperityEncoder, Symbol, Trade, TradingState
-from typing import Any, List
-import numpy as np
+from typing import Any
 
 class Logger:
-    def __init__(self) -> None:
+    def __init__(self, delta_books: bool = False, keyframe_interval: int = 100) -> None:
         self.logs = ""
         self.max_log_length = 3750
+        # In delta mode order depths are logged relative to the previously logged books,
+        # with a full keyframe every keyframe_interval ticks (see logparser.BookDecoder)
+        self.delta_books = delta_books
+        self.keyframe_interval = keyframe_interval
+        self.ticks_since_keyframe = 0
+        self.last_books: dict[Symbol, tuple[dict[int, int], dict[int, int]]] = {}
 
     def print(self, *objects: Any, sep: str = " ", end: str = "\n") -> None:
         self.logs += sep.join(map(str, objects)) + end
 
     def flush(self, state: TradingState, orders: dict[Symbol, list[Order]], conversions: int, trader_data: str) -> None:
-        base_length = len(self.to_json([
-            self.compress_state(state, ""),
-            self.compress_orders(orders),
-            conversions,
-            "",
-            "",
-        ]))
-
-        # We truncate state.traderData, trader_data, and self.logs to the same max. length to fit the log limit
-        max_item_length = (self.max_log_length - base_length) // 3
-
-        print(self.to_json([
-            self.compress_state(state, self.truncate(state.traderData, max_item_length)),
-            self.compress_orders(orders),
-            conversions,
-            self.truncate(trader_data, max_item_length),
-            self.truncate(self.logs, max_item_length),
-        ]))
+        # Everything except the three free-form strings is encoded once; the strings are
+        # spliced into their slots after the leftover budget has been split between them
+        state_json = self.to_json(self.compress_state(state, "")[2:])
+        head = "[[" + self.to_json(state.timestamp) + ","
+        middle = "," + state_json[1:-1] + "]," + self.to_json(self.compress_orders(orders)) + "," + self.to_json(conversions) + ","
+
+        values = [state.traderData, trader_data, self.logs]
+        needs = [self.encoded_length(value) for value in values]
+        base_length = len(head) + len(middle) + 2 + 3 * len('""')
+        budgets = self.allocate(needs, self.max_log_length - base_length)
+        traderData, trader_data, logs = (self.truncate(*args) for args in zip(values, needs, budgets))
+
+        print(head + traderData + middle + trader_data + "," + logs + "]")
 
         self.logs = ""
 
+    def allocate(self, needs: list[int], available: int) -> list[int]:
+        # Smallest need first: whatever a short field leaves unused goes to the longer ones
+        budgets = [0] * len(needs)
+        available = max(available, 0)
+        order = sorted(range(len(needs)), key=needs.__getitem__)
+        for i, index in enumerate(order):
+            budgets[index] = min(needs[index], available // (len(needs) - i))
+            available -= budgets[index]
+
+        return budgets
+
+    def encoded_length(self, value: str) -> int:
+        # Length of value's JSON literal without the quotes, counting the escapes logs usually
+        # contain; other control and non-ASCII characters make it an underestimate
+        return len(value) + value.count('"') + value.count('\\') + value.count('\n')
+
+    def truncate(self, value: str, estimate: int, max_length: int) -> str:
+        # Returns value's JSON literal with its contents (escapes included) cut to max_length
+        if estimate <= max_length:
+            encoded = json.dumps(value)
+            if len(encoded) - 2 <= max_length:
+                return encoded
+            estimate = len(encoded) - 2
+        if max_length < 3:
+            return '""'
+
+        # Only the part that can be kept is encoded: the raw text is cut assuming it escapes at the
+        # string's average rate. Every character encodes to at least one, so dropping the
+        # overshoot in characters always fits
+        cut = (max_length - 3) * len(value) // estimate
+        truncated = json.dumps(value[:cut] + "...")
+        overshoot = len(truncated) - 2 - max_length
+        if overshoot > 0:
+            truncated = json.dumps(value[:max(cut - overshoot, 0)] + "...")
+        return truncated
+
     def compress_state(self, state: TradingState, trader_data: str) -> list[Any]:
         return [
             state.timestamp,
@@ -52,11 +90,43 @@ class Logger:
 
         return compressed
 
-    def compress_order_depths(self, order_depths: dict[Symbol, OrderDepth]) -> dict[Symbol, list[Any]]:
+    def compress_order_depths(self, order_depths: dict[Symbol, OrderDepth]) -> dict[Symbol, list[Any]] | list[Any]:
         compressed = {}
         for symbol, order_depth in order_depths.items():
             compressed[symbol] = [order_depth.buy_orders, order_depth.sell_orders]
 
+        if self.delta_books:
+            return self.compress_book_deltas(compressed)
+
+        return compressed
+
+    def compress_book_deltas(self, books: dict[Symbol, list[Any]]) -> list[Any]:
+        # ["K", books] is a full keyframe. ["D", changes] holds only the symbols whose book changed
+        # since the previous record, each side as a flat [price offset, volume, ...] list with prices
+        # relative to the first level of that side in the previous record and sell volumes made positive
+        if self.ticks_since_keyframe == 0 or books.keys() != self.last_books.keys():
+            compressed = ["K", books]
+            self.ticks_since_keyframe = 0
+        else:
+            changes = {}
+            for symbol, (buy_orders, sell_orders) in books.items():
+                last_buy_orders, last_sell_orders = self.last_books[symbol]
+                if buy_orders != last_buy_orders or sell_orders != last_sell_orders:
+                    changes[symbol] = [self.delta_levels(last_buy_orders, buy_orders, 1),
+                                       self.delta_levels(last_sell_orders, sell_orders, -1)]
+            compressed = ["D", changes]
+
+        self.last_books = {symbol: (dict(buy_orders), dict(sell_orders)) for symbol, (buy_orders, sell_orders) in books.items()}
+        self.ticks_since_keyframe = (self.ticks_since_keyframe + 1) % self.keyframe_interval
+        return compressed
+
+    def delta_levels(self, last: dict[int, int], current: dict[int, int], sign: int) -> list[int]:
+        reference = next(iter(last), 0)
+        compressed = []
+        for price, volume in current.items():
+            compressed.append(price - reference)
+            compressed.append(sign * volume)
+
         return compressed
 
     def compress_trades(self, trades: dict[Symbol, list[Trade]]) -> list[list[Any]]:
@@ -100,86 +170,279 @@ class Logger:
     def to_json(self, value: Any) -> str:
         return json.dumps(value, cls=ProsperityEncoder, separators=(",", ":"))
 
-    def truncate(self, value: str, max_length: int) -> str:
-        if len(value) <= max_length:
-            return value
-
-        return value[:max_length - 3] + "..."
-
 logger = Logger()
 
+class RingBuffer:
+    """Fixed-capacity history of floats, indexed like a list ([-1] is the newest value)."""
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.values = [0.0] * capacity
+        self.start = 0
+        self.size = 0
+
+    def append(self, value: float) -> None:
+        if self.size < self.capacity:
+            self.values[(self.start + self.size) % self.capacity] = value
+            self.size += 1
+        else:
+            self.values[self.start] = value
+            self.start = (self.start + 1) % self.capacity
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, i: int) -> float:
+        if i < 0:
+            i += self.size
+        if not 0 <= i < self.size:
+            raise IndexError("ring buffer index out of range")
+        return self.values[(self.start + i) % self.capacity]
+
+    def __iter__(self):
+        for i in range(self.size):
+            yield self.values[(self.start + i) % self.capacity]
+
+
+class RollingWindow(RingBuffer):
+    """RingBuffer that also keeps the running mean and population variance of its values in O(1)."""
+
+    def __init__(self, capacity: int) -> None:
+        super().__init__(capacity)
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def append(self, value: float) -> None:
+        if self.size == self.capacity:
+            evicted = self.values[self.start]
+            self.total -= evicted
+            self.total_sq -= evicted * evicted
+        super().append(value)
+        self.total += value
+        self.total_sq += value * value
+        if self.start == 0 and self.size == self.capacity:
+            # Once per wrap-around, so rounding errors from evictions cannot accumulate (amortised O(1))
+            self.refresh()
+
+    def refresh(self) -> None:
+        # Recompute the running sums from the stored values, e.g. after a StateCodec restore
+        values = list(self)
+        self.total = sum(values)
+        self.total_sq = sum(value * value for value in values)
+
+    def mean(self) -> float:
+        return self.total / self.size if self.size else 0.0
+
+    def variance(self) -> float:
+        if not self.size:
+            return 0.0
+        mean = self.total / self.size
+        return max(self.total_sq / self.size - mean * mean, 0.0)
+
+    def std(self) -> float:
+        return self.variance() ** 0.5
+
+
+class StateCodec:
+    """Packs a trader's ring buffers, float scalars and fixed-length float lists into a fixed-size base64 traderData string.
+
+    The layout is a version byte, (start, size) per buffer, then every buffer slot, scalar and
+    array element as a little-endian double, so encode and decode cost the same on every tick.
+    Array names may be dotted paths to an attribute of an attribute, e.g. 'rls_model.theta'.
+    """
+    version = 1
+
+    def __init__(self, buffers: dict[str, int], scalars: list[str], arrays: dict[str, int] = None) -> None:
+        self.buffers = buffers
+        self.scalars = scalars
+        self.arrays = arrays or {}
+        self.struct = struct.Struct("<B" + "HH" * len(buffers)
+                                    + "d" * (sum(buffers.values()) + len(scalars) + sum(self.arrays.values())))
+
+    @staticmethod
+    def owner(trader: Any, path: str) -> tuple[Any, str]:
+        *parents, name = path.split(".")
+        for parent in parents:
+            trader = getattr(trader, parent)
+        return trader, name
+
+    def encode(self, trader: Any) -> str:
+        header = []
+        values = []
+        for name in self.buffers:
+            buffer = getattr(trader, name)
+            header += [buffer.start, buffer.size]
+            values += buffer.values
+        for name in self.scalars:
+            values.append(getattr(trader, name))
+        for path in self.arrays:
+            owner, name = self.owner(trader, path)
+            values += getattr(owner, name)
+
+        return base64.b64encode(self.struct.pack(self.version, *header, *values)).decode("ascii")
+
+    def decode(self, trader_data: str, trader: Any) -> bool:
+        """Restore the trader's state from trader_data; leaves it untouched if the string doesn't match this layout."""
+        try:
+            unpacked = self.struct.unpack(base64.b64decode(trader_data))
+        except (ValueError, struct.error):
+            return False
+        if unpacked[0] != self.version:
+            return False
+
+        offset = 1 + 2 * len(self.buffers)
+        for i, (name, capacity) in enumerate(self.buffers.items()):
+            # Restored in place so RingBuffer subclasses keep their type
+            buffer = getattr(trader, name)
+            buffer.start, buffer.size = unpacked[1 + 2 * i], unpacked[2 + 2 * i]
+            buffer.values = list(unpacked[offset:offset + capacity])
+            if hasattr(buffer, "refresh"):
+                buffer.refresh()
+            offset += capacity
+        for name in self.scalars:
+            setattr(trader, name, unpacked[offset])
+            offset += 1
+        for path, length in self.arrays.items():
+            owner, name = self.owner(trader, path)
+            setattr(owner, name, list(unpacked[offset:offset + length]))
+            offset += length
+
+        return True
+
+
+class RecursiveLeastSquares:
+    """Exponentially weighted least squares updated one observation at a time in O(k^2) pure Python.
+
+    theta holds the coefficients and p the k x k inverse information matrix row-major, both as
+    plain lists. p is symmetric, so StateCodec carries only p_upper, its upper triangle row by row.
+    """
+
+    def __init__(self, theta: list[float], p_upper: list[float]) -> None:
+        self.k = len(theta)
+        self.theta = list(theta)
+        self.p = [0.0] * (self.k * self.k)
+        self.p_upper = p_upper
+
+    @property
+    def p_upper(self) -> list[float]:
+        k = self.k
+        return [self.p[i * k + j] for i in range(k) for j in range(i, k)]
+
+    @p_upper.setter
+    def p_upper(self, values: list[float]) -> None:
+        k = self.k
+        p = self.p
+        index = 0
+        for i in range(k):
+            for j in range(i, k):
+                p[i * k + j] = p[j * k + i] = values[index]
+                index += 1
+
+    def predict(self, x: list[float]) -> float:
+        return sum(t * v for t, v in zip(self.theta, x))
+
+    def update(self, x: list[float], y: float, forgetting: float) -> None:
+        k = self.k
+        p = self.p
+        px = [sum(p[i * k + j] * x[j] for j in range(k)) for i in range(k)]
+        denominator = forgetting + sum(v * w for v, w in zip(x, px))
+        gain = [v / denominator for v in px]
+        error = y - self.predict(x)
+        self.theta = [t + g * error for t, g in zip(self.theta, gain)]
+        # P = (P - g (Px)^T) / lambda, kept exactly symmetric so rounding doesn't accumulate
+        scale = 1 / forgetting
+        for i in range(k):
+            gi = gain[i]
+            row = i * k
+            for j in range(i, k):
+                value = (p[row + j] - gi * px[j]) * scale
+                p[row + j] = value
+                p[j * k + i] = value
+
 class Trader:
-    max_position = {'AMETHYSTS' : 20, 'STARFRUIT' : 20}
-    position = {'AMETHYSTS' : 0, 'STARFRUIT' : 0}
-    def amethysts(self, order_depth, statePos):
-        orders = {'AMETHYSTS' : []}
-        prod = "AMETHYSTS"
-        self.position[prod] = statePos.get(prod, 0)
+    POSITION_LIMIT = {'AMETHYSTS' : 20, 'STARFRUIT' : 20}
+
+    # Order generation is the same for every product (see orders_for); a product only picks the
+    # method giving its fair value, how far below/above fair an ask/bid must be to take it, and
+    # the minimum distance of its two quotes from fair. A fair value of None skips the tick.
+    products = {
+        'AMETHYSTS': {'fair_value': 'fixed_fair_value', 'fair': 10000, 'take_edge': 0, 'ask_offset': 3, 'bid_offset': 3},
+        'STARFRUIT': {'fair_value': 'starfruit_fair_value', 'take_edge': 0, 'ask_offset': 2, 'bid_offset': 2},
+    }
+
+    def orders_for(self, product, order_depth, position):
+        config = self.products[product]
+        fair = getattr(self, config['fair_value'])(product, order_depth)
+        if fair is None:
+            return []
+
+        orders = []
+        limit = self.POSITION_LIMIT[product]
         alrBought = 0
         alrSold = 0
-        best_ask = 10000
-        best_bid = 10000
-        if len(order_depth[prod].sell_orders) != 0:
-            sells = list(order_depth[prod].sell_orders.items())
+        best_ask = fair
+        best_bid = fair
+        ask = None
+        if len(order_depth.sell_orders) != 0:
+            sells = list(order_depth.sell_orders.items())
             best_ask = sells[0][0]
             for ask, ask_amount in sells:
-                if int(ask) < 10000:
-                    if self.position[prod] + alrBought - ask_amount <= 20:
+                if int(ask) < fair - config['take_edge']:
+                    if position + alrBought - ask_amount <= limit:
                         alrBought -= ask_amount
-                        orders['AMETHYSTS'].append(Order(prod, ask, -ask_amount))
+                        orders.append(Order(product, ask, -ask_amount))
                     else:
-                        num = max(20 - self.position[prod] - alrBought, 0)
-                        orders['AMETHYSTS'].append(Order(prod, ask, num))
+                        num = max(limit - position - alrBought, 0)
+                        orders.append(Order(product, ask, num))
                         alrBought += num
                         logger.print("num: " + str(num))
-                if int(ask) == 10000 and self.position[prod] + alrBought < 0:
+                if int(ask) == fair and position + alrBought < 0:
                     alrBought -= ask_amount
-                    orders['AMETHYSTS'].append(Order(prod, ask, -ask_amount))
+                    orders.append(Order(product, ask, -ask_amount))
 
-        if len(order_depth[prod].buy_orders) != 0:
-            buys = list(order_depth[prod].buy_orders.items())
+        if len(order_depth.buy_orders) != 0:
+            buys = list(order_depth.buy_orders.items())
             best_bid = buys[0][0]
             for bid, bid_amount in buys:
-                if int(bid) > 10000:
-                    if self.position[prod] - alrSold - bid_amount >= -20:
+                if int(bid) > fair + config['take_edge']:
+                    if position - alrSold - bid_amount >= -limit:
                         alrSold += bid_amount
-                        orders['AMETHYSTS'].append(Order(prod, bid, -bid_amount))
+                        orders.append(Order(product, bid, -bid_amount))
                     else:
-                        num = min(-20 - self.position[prod] + alrSold, 0)
-                        orders['AMETHYSTS'].append(Order(prod, bid, num))
+                        num = min(-limit - position + alrSold, 0)
+                        orders.append(Order(product, bid, num))
                         alrSold -= num
                         logger.print("num: " + str(num))
-                if int(ask) == 10000 and self.position[prod] - alrSold > 0:
+                # Checks the last ask level rather than this bid, as the per-product versions did
+                if ask is not None and int(ask) == fair and position - alrSold > 0:
                     alrSold += bid_amount
-                    orders['AMETHYSTS'].append(Order(prod, bid, -bid_amount))
+                    orders.append(Order(product, bid, -bid_amount))
 
-       
+        orders.append(Order(product, max(fair + config['ask_offset'], best_ask - 1), min(0, -(position + limit - alrSold))))
+        orders.append(Order(product, min(fair - config['bid_offset'], best_bid + 1), max(0, limit - position - alrBought)))
+        return orders
+
+    def fixed_fair_value(self, product, order_depth):
+        return self.products[product]['fair']
 
-        orders['AMETHYSTS'].append(Order(prod, max(10003, best_ask - 1), min(0, -(self.position[prod] + self.max_position[prod] - alrSold))))
-        orders['AMETHYSTS'].append(Order(prod, min(9997, best_bid + 1), max(0, self.max_position[prod] - self.position[prod] - alrBought)))
 
-    
-        return orders['AMETHYSTS']
-    
 #     def predict_returns(self,m1, m2, m3, m4, m5, m6, bid_vol_delta, ask_vol_delta, total_bid_vol, totak_ask_vol, spread):
 # 
 
-    def predict_returns(self,m1, m2, m3, m4, m5, m6):
+    def predict_returns(self, returns):
 #         ratio = bid_vol_delta/ask_vol_delta if not np.isclose(ask_vol_delta, 0) else 0
 #         ratio2 = total_bid_vol/totak_ask_vol
-        r1 = m1/m2-1
-        r2 = m2/m3-1
-        r3 = m3/m4-1
-        r4 = m4/m5-1
-        r5 = m5/m6-1
-        std = np.std([r1, r2, r3, r4, r5])
-        coef_returns_1= -0.6506775720432105
-        coef_returns_2= -0.4347958547786295
-        coef_returns_3= -0.2711080565671277
-        coef_returns_4= -0.1602129408535024
-        coef_returns_5= -0.07744431770528555
-        coef_std= -0.09167417891615853
-        intercept= 2.7187336038375483e-05
+        # returns holds the last five mid-price ratio returns, r1 = m1/m2-1 being the newest
+        r1 = returns[-1]
+        r2 = returns[-2]
+        r3 = returns[-3]
+        r4 = returns[-4]
+        r5 = returns[-5]
+        std = returns.std()
+        if self.rls:
+            return self.start_rls().predict([r1, r2, r3, r4, r5, std, 1.0])
+        coef_returns_1, coef_returns_2, coef_returns_3, coef_returns_4, coef_returns_5, coef_std = self.starfruit_coefs
+        intercept = self.starfruit_intercept
         
         return coef_returns_1*r1+coef_returns_2*r2+coef_returns_3*r3+coef_returns_4*r4+coef_returns_5*r5 +coef_std*std+ intercept
         
@@ -197,117 +460,97 @@ class Trader:
 
 #         return prediction
 
-    def starfruit(self, order_depth, statePos, prev_mid_price):
-        orders = {'STARFRUIT' : []}
-        prod = "STARFRUIT"
-        
-        self.position[prod] = statePos.get(prod, 0)
-        total = 0
-        alrSold = 0
+    def starfruit_fair_value(self, product, order_depth):
         best_ask = 0
-        ask_vol = 0
         best_bid = 0
-        bid_vol = 0
-        if len(order_depth[prod].sell_orders) != 0:
-            sells = list(order_depth[prod].sell_orders.items())
-            best_ask = sells[0][0]
-            ask_vol = sells[0][1]
-
-        if len(order_depth[prod].buy_orders) != 0:
-            buys = list(order_depth[prod].buy_orders.items())
-            best_bid = buys[0][0]
-            bid_vol = buys[0][1]
+        if len(order_depth.sell_orders) != 0:
+            best_ask = next(iter(order_depth.sell_orders))
+        if len(order_depth.buy_orders) != 0:
+            best_bid = next(iter(order_depth.buy_orders))
 
         mid_price = (best_ask + best_bid) / 2
         prev_mid_price = self.prev_mid_price
         if len(prev_mid_price) <= 6:
-            prev_mid_price.append(mid_price)
-            self.prev_ask_vol.append(-1*ask_vol)
-            self.prev_bid_vol.append(bid_vol)
-            return orders['STARFRUIT']
-        
-        total_ask_vol = 0
-        for aaa_price, avv_vol in list(order_depth[prod].sell_orders.items()):
-            total_ask_vol+= -1*avv_vol
-        total_bid_vol = 0
-        for bbb_price, bvv_vol in list(order_depth[prod].buy_orders.items()):
-            total_bid_vol+= bvv_vol
-        assert total_ask_vol>=0
-        assert total_bid_vol>=0
-        
-        spread = (best_ask-best_bid)/(best_ask+best_bid)
-#         features = [prev_mid_price[-1], prev_mid_price[-2], prev_mid_price[-3]]
-#         features = [mid_price, prev_mid_price[-1], prev_mid_price[-2], prev_mid_price[-3], 
-#                     prev_mid_price[-4],prev_mid_price[-5] , bid_vol - self.prev_bid_vol[-1], -1*ask_vol -self.prev_ask_vol[-1] , total_bid_vol,total_ask_vol, spread ]
-        features = [prev_mid_price[-1], prev_mid_price[-2], prev_mid_price[-3], 
-                    prev_mid_price[-4],prev_mid_price[-5], prev_mid_price[-6]]
-        returns = self.predict_returns(*features)
-        returns =  round((1+returns) * prev_mid_price[-1])
-        logger.print(returns)
-
-        alrBought = 0
-        alrSold = 0
-        best_ask = returns
-        best_bid = returns
-        if len(order_depth[prod].sell_orders) != 0:
-            sells = list(order_depth[prod].sell_orders.items())
-            best_ask = sells[0][0]
-            for ask, ask_amount in sells:
-                if int(ask) < returns:
-                    if self.position[prod] + alrBought - ask_amount <= 20:
-                        alrBought -= ask_amount
-                        orders['STARFRUIT'].append(Order(prod, ask, -ask_amount))
-                    else:
-                        num = np.ceil(max(20 - self.position[prod] - alrBought, 0))
-                        orders['STARFRUIT'].append(Order(prod, ask, num))
-                        alrBought += num
-                        logger.print("num: " + str(num))
-                if int(ask) == returns and self.position[prod] + alrBought < 0:
-                    alrBought -= ask_amount
-                    orders['STARFRUIT'].append(Order(prod, ask, -ask_amount))
+            self.record_mid_price(mid_price)
+            return None
+
+        returns = self.predict_returns(self.returns)
+        fair = round((1+returns) * prev_mid_price[-1])
+        logger.print(fair)
+        self.record_mid_price(mid_price)
+        return fair
+    
+    def record_mid_price(self, mid_price):
+        if len(self.prev_mid_price):
+            new_return = mid_price / self.prev_mid_price[-1] - 1
+            # The window before this return is what predict_returns saw when forecasting it
+            if self.rls and len(self.returns) == self.return_lags:
+                returns = self.returns
+                x = [returns[-1], returns[-2], returns[-3], returns[-4], returns[-5], returns.std(), 1.0]
+                self.start_rls().update(x, new_return, self.rls_forgetting)
+            self.returns.append(new_return)
+        self.prev_mid_price.append(mid_price)
 
-        if len(order_depth[prod].buy_orders) != 0:
-            buys = list(order_depth[prod].buy_orders.items())
-            best_bid = buys[0][0]
-            for bid, bid_amount in buys:
-                if int(bid) > returns:
-                    if self.position[prod] - alrSold - bid_amount >= -20:
-                        alrSold += bid_amount
-                        orders['STARFRUIT'].append(Order(prod, bid, -bid_amount))
-                    else:
-                        num = np.ceil(min(-20 - self.position[prod] + alrSold, 0))
-                        orders['STARFRUIT'].append(Order(prod, bid, num))
-                        alrSold -= num
-                        logger.print("num: " + str(num))
-                if int(ask) == returns and self.position[prod] - alrSold > 0:
-                    alrSold += bid_amount
-                    orders['STARFRUIT'].append(Order(prod, bid, -bid_amount))
+    # starfruit needs the last 7 mid prices and the 5 returns between the latest 6; the histories
+    # are carried in traderData so they survive the exchange restarting the lambda
+    history = 7
+    return_lags = 5
+    state_codec = StateCodec({'prev_mid_price': history, 'returns': return_lags}, [])
+
+    # predict_returns coefficients for r1..r5 and the std of the returns, then the intercept, and
+    # (X^T X)^-1 of the training rows in that order as an upper triangle (the RLS prior below);
+    # coefficients.py --trader rewrites these constants when it refits them
+    starfruit_coefs = [-0.6506775720432105, -0.4347958547786295, -0.2711080565671277, -0.1602129408535024,
+                       -0.07744431770528555, -0.09167417891615853]
+    starfruit_intercept = 2.7187336038375483e-05
+    starfruit_rls_prior = [435.4824636271678, 298.2106897576606, 197.2084470172044, 122.61253385885993,
+                           61.1701135032796, 2.384491095200924, -0.0011480599836013294, 631.1261462416261,
+                           416.0034822200757, 253.44425740598925, 122.58971596579916, -0.5884968211577615,
+                           -0.0005263531306190154, 685.8756910521868, 415.96296281695874, 197.1687796077402,
+                           -1.4369437475262226, -0.00035000865917067715, 631.0799031064357, 298.1805384286619,
+                           -2.7872430281806158, 0.00012838334221858982, 435.4787385019216, -6.096987007703879,
+                           0.001343561755394626, 1513.1248351311242, -0.44288426454581237, 0.00016298463606624926]
+
+    # Optional in-session refit of those coefficients by recursive least squares, starting from them.
+    # P starts at starfruit_rls_prior times rls_prior_scale: 1 weighs the fit like the training rows
+    # it came from, larger values trust it less. Older observations are down-weighted by
+    # rls_forgetting per tick. rls_codec's traderData is 516 characters against state_codec's 140,
+    # and the log record carries it twice (state.traderData and trader_data), so RLS mode takes
+    # 752 more characters of the 3750-character log budget
+    rls = False
+    rls_forgetting = 0.999
+    rls_prior_scale = 1.0
+    rls_codec = StateCodec({'prev_mid_price': history, 'returns': return_lags}, [], {'rls_model.theta': 7, 'rls_model.p_upper': 28})
 
-        self.prev_mid_price.append(mid_price)
-        self.prev_ask_vol.append(-1*ask_vol)
-        self.prev_bid_vol.append(bid_vol)
-        
-        orders['STARFRUIT'].append(Order(prod, max(returns + 2, best_ask - 1), min(0, -(self.position[prod] + self.max_position[prod] - alrSold))))
-        orders['STARFRUIT'].append(Order(prod, min(returns - 2, best_bid + 1), max(0, self.max_position[prod] - self.position[prod] - alrBought)))
-        return orders['STARFRUIT']
-    
     def __init__(self):
-        self.prev_mid_price = []
-        self.prev_ask_vol = []
-        self.prev_bid_vol = []
-    def run(self, state: TradingState) -> tuple[dict[Symbol, list[Order]], int, str]:
+        self.prev_mid_price = RingBuffer(self.history)
+        self.returns = RollingWindow(self.return_lags)
+        self.rls_model = None
 
-        result = {'AMETHYSTS': [], 'STARFRUIT': []}
-        conversions = 0
-        trader_data = ""
+    def start_rls(self):
+        if self.rls_model is None:
+            self.rls_model = RecursiveLeastSquares(self.starfruit_coefs + [self.starfruit_intercept],
+                                                   [self.rls_prior_scale * value for value in self.starfruit_rls_prior])
+        return self.rls_model
 
-        # TODO: Add logic
-        prev_bid_ask_vol = []
-        prev_mid_price = []
-        amethystOrders = self.amethysts(state.order_depths, state.position)
-        starfruitOrders = self.starfruit(state.order_depths, state.position, prev_mid_price)
-        result['STARFRUIT'] = starfruitOrders
-        result['AMETHYSTS'] = amethystOrders
+    def run(self, state: TradingState) -> tuple[dict[Symbol, list[Order]], int, str]:
+        state_codec = self.state_codec
+        if self.rls:
+            # The RLS coefficients travel in traderData too, so they survive a lambda restart
+            state_codec = self.rls_codec
+            self.start_rls()
+        # Only a fresh instance (first tick or a restarted lambda) needs its state restored
+        if state.traderData and not len(self.prev_mid_price):
+            state_codec.decode(state.traderData, self)
+
+        result = {}
+        conversions = 0
+        for product in self.products:
+            if product in state.order_depths:
+                result[product] = self.orders_for(product, state.order_depths[product], state.position.get(product, 0))
+            else:
+                result[product] = []
 
+        trader_data = state_codec.encode(self)
         logger.flush(state, result, conversions, trader_data)
         return result, conversions, trader_data
\ No newline at end of file
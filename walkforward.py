@@ -0,0 +1,199 @@
+"""Walk-forward validation of next-tick return regressions over the round day files.
+
+For a product the available days are put in time order and each fold trains on every day
+before its test day (an expanding window), so no fold ever sees the future. Every (feature set,
+day) pair is reduced once to its X^T X / X^T y sums and cached on disk, keyed on the day file
+and on the source of the modules that define the features (FEATURE_FILES); a fold's fit is the
+merge of its training days' sums, and its out-of-sample R^2 and MSE come from the test day's
+sums, so evaluating a feature set costs one pass over each day no matter how many folds use it.
+
+    python walkforward.py STARFRUIT r1,r2,r3,r4,r5,std5 r1,r2,r3,spread --workers 4
+    python walkforward.py ORCHIDS r1,r2,d_sunlight,d_humidity
+
+Feature names:
+    r<k>            return k ticks back (r1 is the latest return)
+    std<n>          population std of the last n returns
+    <name>          a batchfeatures feature (round-1 books) or an observation column (round 2),
+                    e.g. spread, bid_flow, sunlight, export_tariff
+    d_<name>        first difference of any of the above
+
+The Trader's own STARFRUIT set (r1..r5, std5) is also backtested on each test day with the
+fold's coefficients, which is reported as the fold's PnL.
+"""
+import argparse
+import functools
+import hashlib
+import os
+import re
+import sys
+import time
+
+import numpy as np
+from backtester import prices_path, process_pool
+from batchfeatures import BATCH_FEATURES, Columns, diff_with_nan
+from coefficients import NormalEquations, available_days, lagged_return, return_std, tick_returns
+from datacache import DATA_DIR, load_csv
+
+TRADER_FEATURES = ["r1", "r2", "r3", "r4", "r5", "std5"]
+# Modules that define the feature columns; editing any of them invalidates the cached statistics
+FEATURE_FILES = [os.path.join(DATA_DIR, name) for name in ("walkforward.py", "batchfeatures.py", "coefficients.py")]
+
+
+class DayFrame:
+    """One product's price series of one day, with the feature columns derived from it."""
+
+    def __init__(self, path: str, product: str) -> None:
+        table = load_csv(path)
+        if "product" in table.categories:
+            self.columns = Columns(table, product)
+            self.table = None
+            self.price = self.columns.mid_price
+        else:
+            # Round 2 files are one wide row per timestamp, one column per product or observation
+            self.columns = None
+            self.table = table
+            self.price = np.asarray(table[product], dtype=np.float64)
+        self.returns = tick_returns(self.price)
+
+    def feature(self, name: str) -> np.ndarray:
+        if name.startswith("d_"):
+            return diff_with_nan(self.feature(name[2:]))
+
+        # The return features are coefficients.py's, the ones the Trader's model is fitted on
+        match = re.fullmatch(r"r(\d+)", name)
+        if match:
+            return lagged_return(self.returns, int(match.group(1)))
+
+        match = re.fullmatch(r"std(\d+)", name)
+        if match:
+            return return_std(self.returns, int(match.group(1)))
+
+        if self.columns is not None and name in BATCH_FEATURES:
+            return BATCH_FEATURES[name](self.columns)
+        if self.table is not None and name.upper() in self.table.columns:
+            return np.asarray(self.table[name.upper()], dtype=np.float64)
+        raise KeyError(f"unknown feature {name!r}")
+
+    def design(self, features: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        """Feature rows at each tick with the next tick's return as target; rows with any NaN/inf are dropped."""
+        x = np.column_stack([self.feature(name) for name in features])[:-1]
+        y = self.returns[1:]
+        valid = np.isfinite(x).all(axis=1) & np.isfinite(y)
+        return x[valid], y[valid]
+
+
+def day_files(product: str, data_dir: str = DATA_DIR) -> list[tuple[int, int, str]]:
+    """(round, day, path) of every prices file that has the product, in time order."""
+    return [(round_num, day, prices_path(round_num, day, data_dir)) for round_num, day in available_days(product, data_dir)]
+
+
+@functools.lru_cache(maxsize=None)
+def feature_code_hash() -> str:
+    digest = hashlib.sha1()
+    for path in FEATURE_FILES:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def stats_path(product: str, features: list[str], path: str, cache_dir: str) -> str:
+    stat = os.stat(path)
+    key = (f"{product}|{','.join(features)}|{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}|"
+           f"{feature_code_hash()}")
+    return os.path.join(cache_dir, hashlib.sha1(key.encode()).hexdigest() + ".npz")
+
+
+def day_stats(task: tuple[str, tuple[str, ...], str, str]) -> NormalEquations:
+    """Sufficient statistics of one feature set on one day, read from the cache when the day file is unchanged."""
+    product, features, path, cache_dir = task
+    cached = stats_path(product, list(features), path, cache_dir)
+    stats = NormalEquations(len(features))
+    if os.path.exists(cached):
+        with np.load(cached) as saved:
+            stats.xtx, stats.xty = saved["xtx"], saved["xty"]
+            stats.yty, stats.y_sum, stats.rows = float(saved["yty"]), float(saved["y_sum"]), int(saved["rows"])
+        return stats
+
+    stats.add(*DayFrame(path, product).design(list(features)))
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = cached + ".tmp.npz"
+    np.savez(tmp_path, xtx=stats.xtx, xty=stats.xty, yty=stats.yty, y_sum=stats.y_sum, rows=stats.rows)
+    os.replace(tmp_path, cached)
+    return stats
+
+
+def backtest_fold(task: tuple[str, int, int, list[float], float]) -> float:
+    from resultcache import cached_backtest
+
+    trader_file, round_num, day, coefs, intercept = task
+    params = {"starfruit_coefs": coefs, "starfruit_intercept": intercept}
+    return cached_backtest(trader_file, round_num, day, params).total_pnl
+
+
+def walk_forward(product: str, feature_sets: list[list[str]], workers: int | None = None,
+                 trader_file: str | None = os.path.join(DATA_DIR, "trader.py"), data_dir: str = DATA_DIR,
+                 cache_dir: str | None = None) -> list[dict]:
+    """One row per (feature set, fold) with the fitted coefficients and out-of-sample R^2, MSE and PnL."""
+    cache_dir = cache_dir or os.path.join(data_dir, ".cache", "walkforward")
+    days = day_files(product, data_dir)
+    tasks = [(product, tuple(features), path, cache_dir) for features in feature_sets for _, _, path in days]
+    workers = workers or os.cpu_count() or 1
+
+    executor = process_pool(workers) if workers > 1 else None
+    try:
+        mapper = executor.map if executor else map
+        stats = dict(zip([(task[1], task[2]) for task in tasks], mapper(day_stats, tasks)))
+
+        rows = []
+        for features in feature_sets:
+            for fold in range(1, len(days)):
+                train = NormalEquations(len(features))
+                for _, _, path in days[:fold]:
+                    train = train.merge(stats[(tuple(features), path)])
+                test_round, test_day, test_path = days[fold]
+                test = stats[(tuple(features), test_path)]
+                beta = train.solve()
+                rows.append({
+                    "features": ",".join(features),
+                    "train": " ".join(f"{round_num}:{day}" for round_num, day, _ in days[:fold]),
+                    "test": f"{test_round}:{test_day}",
+                    "rows": test.rows,
+                    "r2": test.r2(beta),
+                    "mse": test.mse(beta),
+                    "pnl": None,
+                    "intercept": float(beta[0]),
+                    "coef": beta[1:].tolist(),
+                })
+
+        # Only the Trader's own feature set can be backtested with the fitted coefficients
+        backtests = [(i, (trader_file, *map(int, row["test"].split(":")), row["coef"], row["intercept"]))
+                     for i, row in enumerate(rows)
+                     if trader_file and product == "STARFRUIT" and row["features"] == ",".join(TRADER_FEATURES)]
+        for (i, _), pnl in zip(backtests, mapper(backtest_fold, [task for _, task in backtests])):
+            rows[i]["pnl"] = pnl
+    finally:
+        if executor:
+            executor.shutdown()
+
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward validation of next-tick return regressions")
+    parser.add_argument("product", help="e.g. STARFRUIT (round 1) or ORCHIDS (round 2)")
+    parser.add_argument("feature_sets", nargs="*", help="comma-separated feature names (default: the Trader's set)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--trader", default=os.path.join(DATA_DIR, "trader.py"), help="trader file for the PnL column")
+    args = parser.parse_args()
+
+    feature_sets = [feature_set.split(",") for feature_set in args.feature_sets] or [TRADER_FEATURES]
+    start = time.perf_counter()
+    rows = walk_forward(args.product, feature_sets, args.workers, args.trader)
+    elapsed = time.perf_counter() - start
+
+    for row in rows:
+        pnl = f"{row['pnl']:,.1f}" if row["pnl"] is not None else "-"
+        print(f"{row['features']:<40} train {row['train']:<12} test {row['test']:<5} rows {row['rows']:>6} "
+              f"R^2 {row['r2']:>8.4f}  MSE {row['mse']:.3e}  PnL {pnl}")
+    print(f"{len(feature_sets)} feature sets, {len(rows)} folds in {elapsed:.2f}s", file=sys.stderr)